@@ -0,0 +1,174 @@
+"""
+    Benchmark the schedulers on synthetic instances across size tiers.
+
+    Every scheduler runs as a script in its own process, so the peak memory is per run. Model build
+    and solve times and the objective come from timing.json or from the model left by the script,
+    and are written to benchmark.csv. A previous benchmark.csv given as the baseline flags runs that
+    got slower or changed their objective.
+
+    With --build-sizes only the model build is timed, in process, over instances of growing candidate
+    counts, to check that it grows linearly with the number of variables.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from InstanceGenerator import generate, generate_gd, random_instance, write_instance
+from ModelBuilder import build_model
+
+TIERS = {'small': dict(candidates=100, companies=6, slots=20),
+         'medium': dict(candidates=400, companies=15, slots=30),
+         'large': dict(candidates=1200, companies=30, slots=40)}
+SCHEDULERS = ('mip', 'gd', 'pulp', 'scip', 'gurobi')
+HERE = os.path.dirname(os.path.abspath(__file__))
+MARK = 'BENCHMARK '
+
+# Run a script as __main__ and report the peak memory, and the model timings and objective when it leaves sm and x behind
+CHILD = '''
+import json, runpy, sys, time
+sys.path.insert(0, {here!r})
+from PhaseTimer import peak_rss_mb, phase_totals
+sys.argv = {argv!r}
+clock = time.perf_counter()
+g = runpy.run_path(sys.argv[0], run_name='__main__')
+res = dict(total=time.perf_counter() - clock, peak_rss_mb=peak_rss_mb())
+if 'sm' in g and 'x' in g:
+    res.update(model=dict(phases=phase_totals(g['sm'].timings)), objective=g['sm'].objective, status=str(g['status']))
+print({mark!r} + json.dumps(res))
+'''
+
+
+def scheduler_args(scheduler, inst, solver):
+    """Command line of a scheduler on the instance in directory inst, InterviewScheduler and the GD scheduler write to out"""
+    def f(*parts):
+        return os.path.join(inst, *parts)
+
+    if scheduler == 'mip':
+        return [os.path.join(HERE, 'InterviewScheduler.py'), f('Shortlists.csv'), f('SlotsPanels.csv'), '-s', f('SlotsInterview.csv'), '-p',
+                f('prefs.csv'), '-o', 'out', '--solver', solver, '--no-cache']
+    if scheduler == 'gd':
+        return [os.path.join(HERE, 'InterviewGDScheduler.py'), f('gd', 'Shortlists.csv'), f('gd', 'SlotsPanels.csv'), f('gd', 'SlotsGD.csv'),
+                f('gd', 'GDPanels.csv'), '-o', 'out', '--solver', solver]
+    script = {'pulp': 'InterviewSchedulerPulp.py', 'scip': 'InterviewSchedulerSCIP.py', 'gurobi': 'InterviewSchedulerGurobi.py'}[scheduler]
+    argv = [os.path.join(HERE, script), f('ShortlistsMatrix.csv'), f('SlotsPanels.csv'), f('prefs.csv')]
+    return argv + [f('SlotsInterview.csv')] if scheduler == 'gurobi' else argv
+
+
+def run(scheduler, inst, rundir, solver, timeout=None):
+    """Run one scheduler in rundir and return its status, objective, build and solve seconds, total seconds and peak RSS"""
+    if not os.path.exists(rundir):
+        os.makedirs(rundir)
+    code = CHILD.format(here=HERE, argv=scheduler_args(scheduler, inst, solver), mark=MARK)
+    result = dict(status='Failed', objective=np.nan, build=np.nan, solve=np.nan, total=np.nan, peak_rss_mb=np.nan)
+    try:
+        proc = subprocess.run([sys.executable, '-c', code], cwd=rundir, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        result['status'] = 'Timeout'
+        return result
+    with open(rundir + '\\log.txt', 'w') as log:
+        log.write(proc.stdout + proc.stderr)
+    lines = [line[len(MARK):] for line in proc.stdout.splitlines() if line.startswith(MARK)]
+    if proc.returncode or not lines:
+        return result
+    res = json.loads(lines[-1])
+    # InterviewScheduler and the GD scheduler keep their model inside generateSchedule and report it in timing.json
+    timing = os.path.join(rundir, 'out\\timing.json')
+    if 'model' not in res and os.path.exists(timing):
+        with open(timing) as f:
+            report = json.load(f)
+        res.update((k, report[k]) for k in ('model', 'objective', 'status') if k in report)
+    phases = res.get('model', dict()).get('phases', dict())
+    result.update(status=res.get('status', 'Done'), objective=res.get('objective', np.nan), total=res['total'], peak_rss_mb=res['peak_rss_mb'])
+    if phases:
+        result.update(build=sum(v for k, v in phases.items() if k != 'solver'), solve=phases.get('solver', np.nan))
+    return result
+
+
+def build_scaling(sizes, companies=30, slots=40, density=0.15, multi_slot=0.3, seed=0, blocks=False, repeat=3):
+    """Best of repeat seconds to build the model and its sparse matrix for each candidate count in sizes, with the time per variable"""
+    rows = list()
+    for n in sizes:
+        sint, pair_c, pair_n, panels, ranks = random_instance(n, companies, slots, density, multi_slot, seed=seed)
+        demand = np.minimum(np.bincount(pair_c, minlength=companies), panels.sum(axis=0) // sint) * sint
+        build = matrix = np.inf
+        for _ in range(repeat):
+            clock = time.perf_counter()
+            sm = build_model(range(slots), range(companies), range(n), panels, pair_c, pair_n, sint, demand=demand, blocks=blocks)
+            built = time.perf_counter()
+            sm.csr()
+            build, matrix = min(build, built - clock), min(matrix, time.perf_counter() - built)
+        rows.append([n, sm.num_vars, sm.num_rows, sm.nnz, build, matrix, 1e6 * (build + matrix) / max(sm.num_vars, 1)])
+    return pd.DataFrame(rows, columns=['Candidates', 'Variables', 'Rows', 'Nonzeros', 'Build', 'Matrix', 'Microseconds per variable'])
+
+
+def regressions(table, baseline, tolerance=0.2, slack=0.5):
+    """Runs more than tolerance and slack seconds slower than the baseline, or with a different objective or status"""
+    merged = table.merge(baseline, on=['Tier', 'Scheduler', 'Solver'], suffixes=('', ' baseline'))
+    slower = merged['Total'] > merged['Total baseline'] * (1 + tolerance) + slack
+    changed = ~np.isclose(merged['Objective'], merged['Objective baseline'], rtol=1e-6, equal_nan=True)
+    status = merged['Status'] != merged['Status baseline']
+    return merged[slower | changed | status]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-o', '--output', help='Directory for the instances, runs and benchmark.csv', default='bench')
+    parser.add_argument('--tiers', help='Size tiers to run', nargs='+', choices=list(TIERS), default=['small', 'medium'])
+    parser.add_argument('--schedulers', help='Schedulers to run, mip and gd are InterviewScheduler and InterviewGDScheduler and the others '
+                        'the single solver scripts', nargs='+', choices=SCHEDULERS, default=['mip', 'gd'])
+    parser.add_argument('--solver', help='MIP solver backend of InterviewScheduler and InterviewGDScheduler', default='gurobi')
+    parser.add_argument('--density', help='Probability of a candidate being shortlisted by a company', type=float, default=0.15)
+    parser.add_argument('--multi-slot', help='Share of companies with multi slot interviews', type=float, default=0.3)
+    parser.add_argument('--oversubscription', help='Shortlisted interview slots per panel slot', type=float, default=1.0)
+    parser.add_argument('--seed', help='Random seed of the instances', type=int, default=0)
+    parser.add_argument('--timeout', help='Seconds after which a run is stopped', type=float)
+    parser.add_argument('-b', '--baseline', help='Previous benchmark.csv to compare with', metavar='benchmark.csv')
+    parser.add_argument('--tolerance', help='Allowed slow down against the baseline as a fraction', type=float, default=0.2)
+    parser.add_argument('--build-sizes', help='Only time the model build for these candidate counts, with the companies and slots of the '
+                        'last tier, and write build.csv', nargs='+', type=int, metavar='CANDIDATES')
+    parser.add_argument('--formulation', help='Model of the build timing, blocks has one variable per interview block',
+                        choices=['slots', 'blocks'], default='slots')
+    parser.add_argument('--repeat', help='Builds per candidate count, the fastest is reported', type=int, default=3)
+
+    args = parser.parse_args()
+    out = os.path.abspath(args.output)
+    if args.build_sizes:
+        size = TIERS[args.tiers[-1]]
+        table = build_scaling(args.build_sizes, size['companies'], size['slots'], args.density, args.multi_slot, args.seed,
+                              args.formulation == 'blocks', args.repeat)
+        if not os.path.exists(out):
+            os.makedirs(out)
+        table.to_csv(out + '\\build.csv', index=False)
+        print(table.to_string(index=False))
+        sys.exit(0)
+    rows = list()
+    for tier in args.tiers:
+        inst = os.path.join(out, tier, 'instance')
+        size = TIERS[tier]
+        write_instance(inst, generate(density=args.density, multi_slot=args.multi_slot, oversubscription=args.oversubscription, seed=args.seed,
+                                      **size))
+        write_instance(os.path.join(inst, 'gd'), generate_gd(size['candidates'], max(2, size['companies'] // 3), size['slots'],
+                                                             oversubscription=args.oversubscription, seed=args.seed))
+        for scheduler in args.schedulers:
+            res = run(scheduler, inst, os.path.join(out, tier, scheduler), args.solver, args.timeout)
+            solver = args.solver if scheduler in ('mip', 'gd') else scheduler
+            rows.append([tier, scheduler, solver, res['status'], res['objective'], res['build'], res['solve'], res['total'], res['peak_rss_mb']])
+            print(tier + ' ' + scheduler + ': ' + res['status'] + ' in ' + str(round(res['total'], 3)) + 's')
+
+    table = pd.DataFrame(rows, columns=['Tier', 'Scheduler', 'Solver', 'Status', 'Objective', 'Build', 'Solve', 'Total', 'Peak RSS MB'])
+    table.to_csv(out + '\\benchmark.csv', index=False)
+    print(table.to_string(index=False))
+
+    if args.baseline:
+        worse = regressions(table, pd.read_csv(args.baseline), args.tolerance)
+        if len(worse):
+            print('Regressions against ' + args.baseline)
+            print(worse.to_string(index=False))
+            sys.exit(1)
+        print('No regressions against ' + args.baseline)
@@ -0,0 +1,118 @@
+"""
+    Capacity checks run before the MIP.
+
+    Every bound is a relaxation of the allocation model, so an error is a proof that the model is
+    infeasible and the solve can be skipped. Warnings point at bottlenecks that do not prove it.
+"""
+import numpy as np
+
+from ModelBuilder import block_panels, first_panel_slots
+
+
+def usable_panels(panels, slots_int, block_start=None, blocks=False):
+    """Panels per slot and company whole interviews can use, slots after the last whole block only count per slot"""
+    panels = np.asarray(panels)
+    if block_start is None:
+        block_start = first_panel_slots(panels)
+    usable = block_panels(panels, slots_int, block_start)
+    if blocks:
+        for c in np.flatnonzero(np.asarray(slots_int) > 1):
+            si = slots_int[c]
+            usable[block_start[c] + max(0, len(panels) - block_start[c]) // si * si:, c] = 0
+    return usable
+
+
+def precheck(slots, companies, names, panels, pair_c, pair_n, slots_int, demand, fixed=(), forbid=(), block_start=None, demand_sense='=',
+             blocks=False):
+    """
+    Check the inputs of build_model for provable infeasibility. Returns the list of errors and the list of warnings.
+    """
+    panels = np.asarray(panels)
+    pair_c, pair_n = np.asarray(pair_c), np.asarray(pair_n)
+    sint, demand = np.asarray(slots_int, dtype=np.int64), np.asarray(demand, dtype=np.int64)
+    nslots, ncomps = panels.shape
+    if block_start is None:
+        block_start = first_panel_slots(panels)
+    usable = usable_panels(panels, sint, block_start, blocks)
+    errors, warnings = [], []
+    exact = demand_sense == '='
+
+    # Companies - the demand has to fit in the panels whole interviews can use
+    capacity = usable.sum(axis=0)
+    for c in np.flatnonzero(exact & (demand > capacity)):
+        broken = [slots[s] for s in np.flatnonzero((panels[:, c] > 0) & (usable[:, c] < panels[:, c]))]
+        msg = companies[c] + ' needs ' + str(demand[c]) + ' slots but its panels hold ' + str(capacity[c]) + ' in whole interviews'
+        if broken:
+            msg += ', interview blocks lose panels in ' + ', '.join(broken[:5]) + (' ...' if len(broken) > 5 else '')
+        errors.append(msg)
+
+    # Candidates - interviews with every company that has to see all of its shortlist must fit in the slots they can use
+    npairs = np.bincount(pair_c, minlength=ncomps)
+    required = exact & (demand >= npairs * sint) & (npairs > 0)
+    need = np.bincount(pair_n, weights=(sint * required)[pair_c], minlength=len(names))
+    reach = np.zeros((nslots, len(names)), dtype=bool)
+    sel = required[pair_c]
+    for c in np.flatnonzero(required):
+        reach[np.ix_(usable[:, c] > 0, pair_n[pair_c == c])] = True
+    free = reach.sum(axis=0)
+    for n in np.flatnonzero(need > free):
+        errors.append(names[n] + ' needs ' + str(int(need[n])) + ' slots for ' + ', '.join(companies[c] for c in pair_c[sel & (pair_n == n)]) +
+                      ' but can only be interviewed in ' + str(int(free[n])) + ' slots')
+    total = np.bincount(pair_n, weights=sint[pair_c], minlength=len(names))
+    over = np.flatnonzero((total > nslots) & (need <= free))
+    if len(over):
+        warnings.append(str(len(over)) + ' candidates have more shortlisted interview slots than slots, e.g. ' +
+                        ', '.join(names[n] for n in over[:5]))
+
+    # Slots - a slot hosts at most as many interviews as it has panels and candidates able to attend
+    candidates = np.zeros((nslots, len(names)), dtype=bool)
+    for c in np.flatnonzero(demand > 0):
+        candidates[np.ix_(usable[:, c] > 0, pair_n[pair_c == c])] = True
+    bound = np.minimum(usable[:, demand > 0].sum(axis=1), candidates.sum(axis=1)).sum()
+    if exact and demand.sum() > bound:
+        short = [slots[s] for s in np.flatnonzero(usable[:, demand > 0].sum(axis=1) > candidates.sum(axis=1))]
+        errors.append('All companies need ' + str(demand.sum()) + ' slots but the slots can host at most ' + str(bound) +
+                      (', candidates run out in ' + ', '.join(short[:5]) if short else ''))
+
+    # Fixed schedule - whole blocks of fixed interviews have to fit the panels, candidates and demand
+    forbidden = set((int(s), int(p)) for s, p in forbid)
+    cells = dict()
+    for s, p in fixed:
+        c, si = pair_c[p], sint[pair_c[p]]
+        # Slots before block_start form the head block of interviews continuing from a frozen slot, as in block_variables
+        head = si > 1 and s < block_start[c]
+        if head:
+            block = range(0, block_start[c])
+        elif si > 1:
+            start = s - (s - block_start[c]) % si
+            block = range(start, min(start + si, nslots))
+        else:
+            block = [s]
+        short = len(block) < si and not head
+        label = 'Fixed ' + names[pair_n[p]] + ' with ' + companies[c] + ' in ' + slots[s]
+        # The model has no variable to fix without panels, or without a whole block in the block formulation
+        if panels[s, c] <= 0 or (blocks and (short or (usable[list(block), c] <= 0).any())):
+            warnings.append(label + ' is ignored since there is no interview block with panels')
+            continue
+        if short or (usable[list(block), c] <= 0).any():
+            errors.append(label + ' is not in a whole interview block with panels')
+        if (s, p) in forbidden:
+            errors.append(label + ' is also excluded')
+        for b in block:
+            cells[b, p] = 1
+    if cells:
+        fs, fp = np.array(list(cells), dtype=np.int64).T
+        fc, fn = pair_c[fp], pair_n[fp]
+        clash = np.zeros((nslots, ncomps), dtype=np.int64)
+        np.add.at(clash, (fs, fc), 1)
+        for s, c in zip(*np.nonzero(clash > panels)):
+            errors.append(str(clash[s, c]) + ' fixed interviews for ' + companies[c] + ' in ' + slots[s] + ' but only ' + str(panels[s, c]) +
+                          ' panels')
+        busy = np.zeros((nslots, len(names)), dtype=np.int64)
+        np.add.at(busy, (fs, fn), 1)
+        for s, n in zip(*np.nonzero(busy > 1)):
+            errors.append(names[n] + ' is fixed to ' + str(busy[s, n]) + ' interviews in ' + slots[s])
+        done = np.bincount(fc, minlength=ncomps)
+        for c in np.flatnonzero(done > demand):
+            errors.append(companies[c] + ' has ' + str(done[c]) + ' fixed interview slots but needs only ' + str(demand[c]))
+    return errors, warnings
@@ -0,0 +1,116 @@
+"""
+    Slot by slot assignment engine for single slot interviews without preferences.
+
+    Every slot is a bipartite assignment of panel seats to candidates, solved with SciPy's shortest
+    augmenting path solver and weighted towards the companies and candidates with the least room in
+    later slots. Allocations are then moved to earlier free seats. With a slot cost shared by all
+    pairs, filling each company's earliest seats is a lower bound, so the result is proven optimal
+    whenever it reaches that bound.
+"""
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+
+def seat_bound(panels, pair_c, pair_n, nnames, demand, fixed=(), first=0):
+    """
+    Lower bound on the slot cost, the larger of two relaxations. Companies fill their earliest free seats ignoring
+    candidate clashes, and candidates take their interviews with companies that see the whole shortlist in the earliest
+    slots where one of those companies has panels, ignoring the panel limits.
+    """
+    panels, pair_c, pair_n = np.asarray(panels), np.asarray(pair_c), np.asarray(pair_n)
+    nslots, ncomps = panels.shape
+    cost = np.arange(1, nslots + 1)
+    seats = panels.astype(np.int64)
+    seats[:first] = 0
+    left = np.array(demand, dtype=np.int64)
+    busy = np.zeros((nslots, nnames), dtype=bool)
+    busy[:first] = True
+    isfixed = np.zeros(len(pair_c), dtype=bool)
+    fixedcost = 0.0
+    for s, p in fixed:
+        fixedcost += s + 1
+        left[pair_c[p]] -= 1
+        busy[s, pair_n[p]] = True
+        isfixed[p] = True
+        if s >= first:
+            seats[s, pair_c[p]] -= 1
+
+    comp = 0.0
+    for c in range(ncomps):
+        used = np.minimum(np.cumsum(np.maximum(seats[:, c], 0)), max(left[c], 0))
+        comp += (np.diff(np.r_[0, used]) * cost).sum()
+
+    free = ~isfixed
+    required = left >= np.bincount(pair_c[free], minlength=ncomps)
+    sel = free & required[pair_c]
+    need = np.bincount(pair_n[sel], minlength=nnames)
+    cand = 0.0
+    for n in np.flatnonzero(need):
+        comps = np.unique(pair_c[sel & (pair_n == n)])
+        reach = np.flatnonzero((seats[:, comps] > 0).any(axis=1) & ~busy[:, n])
+        cand += cost[reach[:need[n]]].sum()
+    return fixedcost + max(comp, cand)
+
+
+def matching_schedule(panels, pair_c, pair_n, nnames, demand, fixed=(), first=0):
+    """
+    Allocate single slot interviews up to demand per company from slot first onwards, fixed (slot, pair) allocations
+    are kept. Returns the (slot, pair) allocations and the lower bound on their slot cost.
+    """
+    panels, pair_c, pair_n = np.asarray(panels), np.asarray(pair_c), np.asarray(pair_n)
+    nslots, ncomps = panels.shape
+    seats = panels.astype(np.int64)
+    busy = np.zeros((nslots, nnames), dtype=bool)
+    slot_of = np.full(len(pair_c), -1, dtype=np.int64)
+    left = np.array(demand, dtype=np.int64)
+    for s, p in fixed:
+        if slot_of[p] < 0:
+            slot_of[p] = s
+            seats[s, pair_c[p]] -= 1
+            busy[s, pair_n[p]] = True
+            left[pair_c[p]] -= 1
+
+    for s in range(first, nslots):
+        cap = np.minimum(np.maximum(seats[s], 0), np.maximum(left, 0))
+        open_ = np.flatnonzero((slot_of < 0) & (cap[pair_c] > 0) & ~busy[s, pair_n])
+        if not len(open_):
+            continue
+        # Urgency - share of the remaining demand that later slots cannot take, and interviews the candidate still has
+        later = np.maximum(seats[s + 1:], 0).sum(axis=0)
+        urgent_c = left / np.maximum(later + cap, 1)
+        pending = np.bincount(pair_n[slot_of < 0], minlength=nnames)
+        cand, col = np.unique(pair_n[open_], return_inverse=True)
+        comp = np.flatnonzero(cap)
+        row_of = np.full(ncomps, -1, dtype=np.int64)
+        row_of[comp] = np.arange(len(comp))
+        weight = np.zeros((len(comp), len(cand)))
+        weight[row_of[pair_c[open_]], col] = 1000 + 10 * urgent_c[pair_c[open_]] + pending[pair_n[open_]] / (nslots - s)
+        # One row per seat of a company
+        seat_rows = np.repeat(np.arange(len(comp)), cap[comp])
+        rows, cols = linear_sum_assignment(weight[seat_rows], maximize=True)
+        ok = weight[seat_rows[rows], cols] > 0
+        pairid = dict(zip(zip(pair_c[open_].tolist(), pair_n[open_].tolist()), open_.tolist()))
+        for r, k in zip(seat_rows[rows[ok]], cols[ok]):
+            p = pairid[comp[r], cand[k]]
+            slot_of[p] = s
+            seats[s, pair_c[p]] -= 1
+            busy[s, pair_n[p]] = True
+            left[pair_c[p]] -= 1
+
+    # Move allocations to earlier free seats of their company while the candidate is free there
+    fixedset = set(p for s, p in fixed)
+    for p in np.argsort(-slot_of, kind='stable'):
+        s, c, n = slot_of[p], pair_c[p], pair_n[p]
+        if s <= first or p in fixedset:
+            continue
+        free = np.flatnonzero((seats[first:s, c] > 0) & ~busy[first:s, n])
+        if len(free):
+            t = first + free[0]
+            seats[s, c] += 1
+            busy[s, n] = False
+            seats[t, c] -= 1
+            busy[t, n] = True
+            slot_of[p] = t
+
+    placed = np.flatnonzero(slot_of >= 0)
+    return list(zip(slot_of[placed].tolist(), placed.tolist())), seat_bound(panels, pair_c, pair_n, nnames, demand, fixed, first)
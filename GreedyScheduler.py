@@ -0,0 +1,162 @@
+"""
+    Greedy allocation heuristic with local search repair.
+
+    Interviews are placed one block of slots at a time in priority order (candidates with the most
+    shortlists and companies with the least spare panels first) into the cheapest feasible block under
+    the same cost array as the MIP. Unplaced interviews are then repaired by moving a conflicting
+    interview of the same candidate, and placed ones are moved to cheaper blocks or swap blocks with
+    another interview of the same company while that helps.
+"""
+import numpy as np
+
+from ModelBuilder import first_panel_slots
+
+
+def greedy_schedule(panels, pair_c, pair_n, nnames, slots_int, demand, obj, fixed=(), first=0, block_start=None, passes=5):
+    """
+    Heuristic allocation returning (slot, pair) tuples.
+
+    demand is the number of slots to allocate per company and obj the (pairs x slots) cost array. fixed (slot, pair)
+    allocations are placed first with the whole block containing them, free interviews only start from slot first.
+    """
+    panels, obj = np.asarray(panels), np.asarray(obj)
+    pair_c, pair_n = np.asarray(pair_c), np.asarray(pair_n)
+    sint, demand = np.asarray(slots_int), np.asarray(demand)
+    nslots, ncomps = panels.shape
+    npairs = len(pair_c)
+    if block_start is None:
+        block_start = first_panel_slots(panels)
+
+    # Block starts per company aligned to its first panel slot, entirely inside the horizon and with panels in every slot
+    starts = []
+    for c in range(ncomps):
+        b = np.arange(block_start[c], nslots - sint[c] + 1, sint[c])
+        ok = np.ones(len(b), dtype=bool)
+        for k in range(sint[c]):
+            ok &= panels[b + k, c] > 0
+        starts.append(b[ok])
+
+    cap = panels.astype(np.int64)
+    busy = np.zeros((nslots, nnames), dtype=bool)
+    start_of = np.full(npairs, -1, dtype=np.int64)
+    done = np.zeros(ncomps, dtype=np.int64)
+    name_pairs = dict()
+    for p, n in enumerate(pair_n.tolist()):
+        name_pairs.setdefault(n, []).append(p)
+    comp_pairs = [np.flatnonzero(pair_c == c) for c in range(ncomps)]
+    # Cost of a block from its start is a difference of running sums
+    cum = np.zeros((npairs, nslots + 1))
+    np.cumsum(obj, axis=1, out=cum[:, 1:])
+    span = sint[pair_c]
+
+    def block_cost(p, b):
+        return cum[p, b + span[p]] - cum[p, b]
+
+    def place(p, b):
+        c, n, si = pair_c[p], pair_n[p], sint[pair_c[p]]
+        cap[b:b + si, c] -= 1
+        busy[b:b + si, n] = True
+        start_of[p] = b
+        done[c] += si
+
+    def remove(p):
+        c, n, si, b = pair_c[p], pair_n[p], sint[pair_c[p]], start_of[p]
+        cap[b:b + si, c] += 1
+        busy[b:b + si, n] = False
+        start_of[p] = -1
+        done[c] -= si
+
+    def options(p):
+        # Feasible block starts of the pair and their cost
+        c, n, si = pair_c[p], pair_n[p], sint[pair_c[p]]
+        b = starts[c][starts[c] >= first]
+        ok = np.ones(len(b), dtype=bool)
+        cost = np.zeros(len(b))
+        for k in range(si):
+            ok &= (cap[b + k, c] > 0) & ~busy[b + k, n]
+            cost += obj[p, b + k]
+        return b[ok], cost[ok]
+
+    # Fixed allocations take the block they fall in
+    isfixed = np.zeros(npairs, dtype=bool)
+    for s, p in fixed:
+        if start_of[p] < 0:
+            si = sint[pair_c[p]]
+            place(p, s - (s - block_start[pair_c[p]]) % si if si > 1 else s)
+            isfixed[p] = True
+
+    crit = np.bincount(pair_n, minlength=nnames)
+    slack = (panels.sum(axis=0) - demand) / np.maximum(demand, 1)
+    order = np.lexsort((np.arange(npairs), slack[pair_c], -crit[pair_n]))
+
+    for p in order:
+        if start_of[p] >= 0 or done[pair_c[p]] + sint[pair_c[p]] > demand[pair_c[p]]:
+            continue
+        b, cost = options(p)
+        if len(b):
+            place(p, b[cost.argmin()])
+
+    for _ in range(passes):
+        changed = False
+        # Repair - make room for an unplaced interview by moving one conflicting interview of the same candidate
+        for p in order:
+            c, n, si = pair_c[p], pair_n[p], sint[pair_c[p]]
+            if start_of[p] >= 0 or done[c] + si > demand[c]:
+                continue
+            for b in starts[c][starts[c] >= first]:
+                if (cap[b:b + si, c] <= 0).any():
+                    continue
+                clash = [q for q in name_pairs[n] if start_of[q] >= 0 and start_of[q] < b + si and b < start_of[q] + sint[pair_c[q]]]
+                if len(clash) != 1 or isfixed[clash[0]]:
+                    continue
+                q, qb = clash[0], start_of[clash[0]]
+                remove(q)
+                place(p, b)
+                qopts, qcost = options(q)
+                if len(qopts):
+                    place(q, qopts[qcost.argmin()])
+                    changed = True
+                    break
+                remove(p)
+                place(q, qb)
+        # Improvement - move placed interviews to cheaper blocks
+        for p in order:
+            if start_of[p] < 0 or isfixed[p]:
+                continue
+            b0 = start_of[p]
+            old = block_cost(p, b0)
+            remove(p)
+            b, cost = options(p)
+            best = cost.argmin()
+            if cost[best] < old - 1e-9:
+                place(p, b[best])
+                changed = True
+            else:
+                place(p, b0)
+        # Swap - exchange the blocks of two interviews of the same company
+        for p in order:
+            if start_of[p] < 0 or isfixed[p]:
+                continue
+            qs = comp_pairs[pair_c[p]]
+            qs = qs[(start_of[qs] >= 0) & ~isfixed[qs] & (qs != p)]
+            bp, bq = start_of[p], start_of[qs]
+            gain = block_cost(p, bq) + block_cost(qs, bp) - block_cost(p, bp) - block_cost(qs, bq)
+            for i in np.argsort(gain):
+                if gain[i] >= -1e-9:
+                    break
+                q = qs[i]
+                remove(p)
+                remove(q)
+                si, cp, cq = span[p], pair_n[p], pair_n[q]
+                if not busy[bq[i]:bq[i] + si, cp].any() and not busy[bp:bp + si, cq].any():
+                    place(p, bq[i])
+                    place(q, bp)
+                    changed = True
+                    break
+                place(p, bp)
+                place(q, bq[i])
+        if not changed:
+            break
+
+    placed = np.flatnonzero(start_of >= 0)
+    return [(int(start_of[p]) + k, int(p)) for p in placed for k in range(span[p])]
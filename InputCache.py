@@ -0,0 +1,46 @@
+"""
+    Binary snapshot of the parsed and validated scheduler inputs.
+
+    Snapshots are .npz files in the output directory keyed on a hash of the input files, so reruns
+    with the same Shortlists.csv, SlotsPanels.csv, SlotsInterview.csv and prefs skip CSV parsing.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+VERSION = 1
+
+
+def input_key(*filenames):
+    h = hashlib.sha1(str(VERSION).encode())
+    for filename in filenames:
+        h.update(b'\0')
+        if filename:
+            with open(filename, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def snapshot_path(out, key):
+    return out + '\\inputs_' + key + '.npz'
+
+
+def save_snapshot(filename, inputs):
+    """Write a dict of arrays and label lists, None values are left out"""
+    arrays = dict((k, np.asarray(v)) for k, v in inputs.items() if v is not None)
+    tmp = filename + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, filename)
+
+
+def load_snapshot(filename):
+    """Read a snapshot back, label arrays are returned as lists of str"""
+    with np.load(filename, allow_pickle=False) as data:
+        inputs = dict((k, data[k]) for k in data.files)
+    for k, v in inputs.items():
+        if v.dtype.kind == 'U':
+            inputs[k] = v.tolist()
+    return inputs
@@ -0,0 +1,77 @@
+"""
+    Columnar loaders for the scheduler input files.
+
+    Names and companies are interned as integer codes so the shortlists come back as two
+    parallel arrays of (company, name) pairs that the model builder uses directly.
+"""
+from string import punctuation
+
+import numpy as np
+import pandas as pd
+
+table = str.maketrans({key: None for key in punctuation})
+
+
+def _clean(values, lower=False, strip_punctuation=False):
+    values = values.str.strip()
+    if lower:
+        values = values.str.lower().str.replace(' ', '_')
+    if strip_punctuation:
+        values = values.str.translate(table)
+    return values
+
+
+def read_csv(filename, engine=None, **kwargs):
+    if engine == 'pyarrow':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            engine = None
+    return pd.read_csv(filename, engine=engine, **kwargs)
+
+
+def load_shortlists(filename, lower=False, engine=None):
+    """Shortlist sheet with one column of names per company -> (companies, names, pair_c, pair_n)"""
+    sldf = read_csv(filename, engine=engine, dtype=str)
+    sldf.columns = _clean(sldf.columns, lower, lower)
+    long = sldf.melt(var_name='company', value_name='name').dropna()
+    long['name'] = _clean(long['name'], lower)
+    long = long[long['name'] != ''].drop_duplicates()
+    companies = sorted(sldf.columns.unique())
+    names = sorted(long['name'].unique())
+    pair_c = pd.Categorical(long['company'], categories=companies).codes.astype(np.int64)
+    pair_n = pd.Categorical(long['name'], categories=names).codes.astype(np.int64)
+    return companies, names, pair_c, pair_n
+
+
+def load_frame(filename, lower=False, engine=None, dtype=None):
+    """Matrix sheet indexed by its first column with columns sorted, e.g. slots x companies or names x companies"""
+    df = read_csv(filename, engine=engine, dtype=dtype)
+    df.columns = _clean(df.columns, lower, lower)
+    df[df.columns[0]] = _clean(df[df.columns[0]].astype(str), lower)
+    df = df.set_index(df.columns[0])
+    return df[sorted(df.columns)]
+
+
+def load_slots_interviews(filename, lower=False, engine=None):
+    """Single row sheet of slots per interview -> Series indexed by company"""
+    sidf = read_csv(filename, engine=engine, dtype=str)
+    sidf.columns = _clean(sidf.columns, lower, lower)
+    return sidf.iloc[0].astype(int)
+
+
+def drop_names(names, pair_c, pair_n, drop):
+    """Remove the given names and their shortlists, re-coding the remaining names"""
+    keep = ~np.isin(np.asarray(names, dtype=object), list(drop))
+    newcode = np.cumsum(keep) - 1
+    sel = keep[pair_n]
+    return [n for n, k in zip(names, keep) if k], pair_c[sel], newcode[pair_n[sel]]
+
+
+def load_names_schedule(filename, lower=False):
+    """Previous names.csv (slots x names with the company in each cell) -> list of (slot, company, name)"""
+    df = pd.read_csv(filename, index_col=0, dtype=str)
+    df.index = _clean(df.index.astype(str), lower)
+    df.columns = _clean(df.columns, lower)
+    long = df.stack().dropna()
+    return [(s, c, n) for (s, n), c in zip(long.index, _clean(long, lower, lower))]
@@ -0,0 +1,129 @@
+"""
+    Synthetic scheduler inputs for benchmarks and tests without real placement data.
+
+    Writes Shortlists.csv, SlotsPanels.csv, SlotsInterview.csv and prefs.csv for InterviewScheduler,
+    ShortlistsMatrix.csv (names x companies of 0/1) for the older scripts, and a GD instance with
+    Shortlists.csv, SlotsPanels.csv, SlotsGD.csv and GDPanels.csv in the gd sub directory.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def shortlist_frame(companies, names, pair_c, pair_n):
+    """One column of names per company, shorter columns padded with blanks"""
+    cols = dict((c, pd.Series([names[n] for n in np.sort(pair_n[pair_c == i])], dtype=object)) for i, c in enumerate(companies))
+    return pd.DataFrame(cols).fillna('')
+
+
+def random_shortlists(rng, ncomps, nnames, nslots, density, slots_int):
+    """(pair_c, pair_n) with every name shortlisted with probability density and never needing more than the slots"""
+    sh = rng.random((nnames, ncomps)) < density
+    # Drop random shortlists of names needing more slots than there are
+    for n in np.flatnonzero(sh.dot(slots_int) > nslots):
+        for c in rng.permutation(np.flatnonzero(sh[n])):
+            if sh[n].dot(slots_int) <= nslots:
+                break
+            sh[n, c] = False
+    pair_n, pair_c = np.nonzero(sh)
+    return pair_c, pair_n
+
+
+def random_panels(rng, nslots, need, slots_int, oversubscription):
+    """Slots x companies panels holding about need / oversubscription interview slots per company from a random start"""
+    panels = np.zeros((nslots, len(need)), dtype=np.int64)
+    for c, (k, si) in enumerate(zip(need, slots_int)):
+        start = rng.integers(0, max(1, nslots // 4))
+        blocks = max(1, (nslots - start) // si)
+        panels[start:start + blocks * si, c] = max(1, int(np.ceil(k / oversubscription / (blocks * si))))
+    return panels
+
+
+def random_instance(candidates=200, companies=10, slots=30, density=0.15, multi_slot=0.3, max_slots_int=3, oversubscription=1.0, seed=0):
+    """
+    Random (slots_int, pair_c, pair_n, panels, ranks) arrays. A multi_slot share of the companies takes 2 up to
+    max_slots_int slots per interview and oversubscription is the ratio of shortlisted interview slots to panel slots.
+    """
+    rng = np.random.default_rng(seed)
+    sint = np.where(rng.random(companies) < multi_slot, rng.integers(2, max(2, max_slots_int) + 1, companies), 1)
+    pair_c, pair_n = random_shortlists(rng, companies, candidates, slots, density, sint)
+    need = np.bincount(pair_c, minlength=companies) * sint
+    panels = random_panels(rng, slots, need, sint, oversubscription)
+    ranks = np.argsort(rng.random((candidates, companies)), axis=1) + 1
+    return sint, pair_c, pair_n, panels, ranks
+
+
+def generate(candidates=200, companies=10, slots=30, density=0.15, multi_slot=0.3, max_slots_int=3, oversubscription=1.0, seed=0):
+    """Random instance of random_instance as a dict of DataFrames keyed by file name"""
+    comps = ['Comp%02d' % (i + 1) for i in range(companies)]
+    names = ['Cand%04d' % (i + 1) for i in range(candidates)]
+    slotnames = ['Slots_%02d' % (i + 1) for i in range(slots)]
+    sint, pair_c, pair_n, panels, ranks = random_instance(candidates, companies, slots, density, multi_slot, max_slots_int, oversubscription, seed)
+    matrix = np.zeros((candidates, companies), dtype=np.int64)
+    matrix[pair_n, pair_c] = 1
+    return {'Shortlists.csv': shortlist_frame(comps, names, pair_c, pair_n),
+            'SlotsPanels.csv': pd.DataFrame(panels, index=pd.Index(slotnames, name='Slot'), columns=comps),
+            'SlotsInterview.csv': pd.DataFrame([sint], columns=comps),
+            'prefs.csv': pd.DataFrame(ranks, index=pd.Index(names, name='Name'), columns=comps),
+            'ShortlistsMatrix.csv': pd.DataFrame(matrix, index=pd.Index(names, name='Name'), columns=comps)}
+
+
+def generate_gd(candidates=200, groups=4, slots=30, density=0.5, max_clones=3, gd_slots=2, oversubscription=1.0, seed=0):
+    """Random GD instance as a dict of DataFrames keyed by file name, GDPanels.csv is a list of clone company rows"""
+    rng = np.random.default_rng(seed)
+    clones = rng.integers(1, max(1, max_clones) + 1, groups)
+    gds = [['gd%02d' % (g + 1)] + ['gd%02d_%d' % (g + 1, k + 1) for k in range(1, n)] for g, n in enumerate(clones)]
+    comps = [c for g in gds for c in g]
+    names = ['cand%04d' % (i + 1) for i in range(candidates)]
+    slotnames = ['slots_%02d' % (i + 1) for i in range(slots)]
+    sint = np.full(groups, gd_slots, dtype=np.int64)
+    gpair_c, gpair_n = random_shortlists(rng, groups, candidates, slots, density, sint)
+    # Clones share the shortlist of their GD and split its panels
+    size = np.bincount(gpair_c, minlength=groups)
+    gpanels = random_panels(rng, slots, np.ceil(size * gd_slots / clones).astype(np.int64), sint, oversubscription)
+    group = np.repeat(np.arange(groups), clones)
+    members = [np.flatnonzero(group == g) for g in range(groups)]
+    pair_c = np.concatenate([np.repeat(m, size[g]) for g, m in enumerate(members)])
+    pair_n = np.concatenate([np.tile(gpair_n[gpair_c == g], len(m)) for g, m in enumerate(members)])
+    return {'Shortlists.csv': shortlist_frame(comps, names, pair_c, pair_n),
+            'SlotsPanels.csv': pd.DataFrame(gpanels[:, group], index=pd.Index(slotnames, name='Slot'), columns=comps),
+            'SlotsGD.csv': pd.DataFrame([sint[group]], columns=comps),
+            'GDPanels.csv': pd.DataFrame([g + [''] * (max(clones) - len(g)) for g in gds])}
+
+
+def write_instance(out, frames):
+    if not os.path.exists(out):
+        os.makedirs(out)
+    for filename, df in frames.items():
+        if filename == 'GDPanels.csv':
+            with open(os.path.join(out, filename), 'w') as f:
+                f.writelines(','.join(c for c in row if c) + '\n' for row in df.itertuples(index=False))
+        else:
+            df.to_csv(os.path.join(out, filename), index=df.index.name is not None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('output', help='Directory to write the instance to')
+    parser.add_argument('-n', '--candidates', help='Number of candidates', type=int, default=200)
+    parser.add_argument('-c', '--companies', help='Number of companies', type=int, default=10)
+    parser.add_argument('-t', '--slots', help='Number of slots', type=int, default=30)
+    parser.add_argument('-d', '--density', help='Probability of a candidate being shortlisted by a company', type=float, default=0.15)
+    parser.add_argument('-m', '--multi-slot', help='Share of companies with multi slot interviews', type=float, default=0.3)
+    parser.add_argument('--max-slots-int', help='Most slots per interview', type=int, default=3)
+    parser.add_argument('-r', '--oversubscription', help='Shortlisted interview slots per panel slot, above 1 not everyone is interviewed',
+                        type=float, default=1.0)
+    parser.add_argument('-g', '--gd-groups', help='Number of GDs in the GD instance, 0 skips it', type=int, default=4)
+    parser.add_argument('--gd-density', help='Probability of a candidate being shortlisted for a GD', type=float, default=0.5)
+    parser.add_argument('--max-clones', help='Most panels (clone companies) per GD', type=int, default=3)
+    parser.add_argument('--seed', help='Random seed', type=int, default=0)
+
+    args = parser.parse_args()
+    write_instance(args.output, generate(args.candidates, args.companies, args.slots, args.density, args.multi_slot, args.max_slots_int,
+                                         args.oversubscription, args.seed))
+    if args.gd_groups:
+        write_instance(os.path.join(args.output, 'gd'), generate_gd(args.candidates, args.gd_groups, args.slots, args.gd_density,
+                                                                    args.max_clones, oversubscription=args.oversubscription, seed=args.seed))
+    print('Instance written to ' + args.output)
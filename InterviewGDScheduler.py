@@ -5,14 +5,18 @@
     Python Version: 3.6
 """
 import argparse
+import cProfile
+import os
+import pstats
 from datetime import datetime
-from string import punctuation
 
 import numpy as np
 import pandas as pd
-from gurobipy import *
 
-table = str.maketrans({key: None for key in punctuation})
+from InputLoader import drop_names, load_frame, load_names_schedule, load_shortlists, load_slots_interviews, table
+from ModelBuilder import SOLVERS, block_panels, build_model, first_panel_slots, solve
+from OutputWriter import names_frame, schedule_frame
+from PhaseTimer import PhaseTimer, phase_totals
 
 
 def read_input_csv(filename, typ=None):
@@ -23,21 +27,6 @@ def read_input_csv(filename, typ=None):
     return sldf.to_dict('index'), sorted(sldf.columns.values), list(sldf.index.values)
 
 
-def read_slots_interviews(filename):
-    sidf = pd.read_csv(filename, dtype=object)
-    sidf.columns = sidf.columns.str.strip().str.lower().str.replace(' ', '_').str.translate(table)
-    sidict = sidf.to_dict('list')
-    return dict((key, int(v[0])) for key, v in sidict.items())
-
-
-def read_shortlists(filename):
-    sldf = pd.read_csv(filename, dtype=object)
-    sldf.columns = sldf.columns.str.strip().str.lower().str.replace(' ', '_').str.translate(table)
-    comps = list(sldf.columns.values)
-    comtupl = [(c, str(n).strip().lower().replace(' ', '_')) for c in comps for n in list(sldf[c].dropna().values)]
-    return dict((x, 1) for x in comtupl), sorted(comps), sorted(set([x[1] for x in comtupl]))
-
-
 def read_gdPanels(filename):
     gdcomp = set()
     with open(filename) as f:
@@ -56,91 +45,161 @@ def read_lp(filename):
     return sorted(set(exnames))
 
 
-def generateSchedule(companies, fixedints, names, panels, shortlists, slots, slots_int, gdpanels, skipinitial, out):
+def number_panels(alloc_s, alloc_g, alloc_n, members, usable, gsi, gstart, pinned):
+    """
+    Spread the (slot, GD, name) allocations of the aggregated model over the clone companies of each GD. Interviews
+    pinned to a clone (fixed schedule) take it first and the others of the block fill the clones in order up to the
+    panels each clone has in the block, so a candidate keeps one panel for the whole GD. Returns the clone company of
+    every allocation.
+    """
+    if not len(alloc_s):
+        return np.zeros(0, dtype=np.int64)
+    blk = (alloc_s - gstart[alloc_g]) // gsi[alloc_g]
+    order = np.lexsort((alloc_s, alloc_n, blk, alloc_g))
+    s, g, n, b, pin = alloc_s[order], alloc_g[order], alloc_n[order], blk[order], np.asarray(pinned)[order]
+    # Interview id of every allocation, the slots of an interview are consecutive
+    new = np.r_[True, (g[1:] != g[:-1]) | (b[1:] != b[:-1]) | (n[1:] != n[:-1])]
+    iv = np.cumsum(new) - 1
+    first = np.flatnonzero(new)
+    ig, ib, islot = g[first], b[first], s[first]
+    ipin = np.full(len(first), -1, dtype=np.int64)
+    np.maximum.at(ipin, iv, pin)
+    clone = ipin.copy()
+    starts = np.flatnonzero(np.r_[True, (ig[1:] != ig[:-1]) | (ib[1:] != ib[:-1])])
+    for lo, hi in zip(starts, np.r_[starts[1:], len(first)]):
+        m = np.asarray(members[ig[lo]])
+        cap = usable[islot[lo], m] - (ipin[lo:hi, None] == m).sum(axis=0)
+        free = np.flatnonzero(ipin[lo:hi] < 0)
+        pos = np.minimum(np.searchsorted(np.cumsum(np.maximum(cap, 0)), np.arange(len(free)), side='right'), len(m) - 1)
+        clone[lo + free] = m[pos]
+    result = np.empty(len(alloc_s), dtype=np.int64)
+    result[order] = clone[iv]
+    return result
+
+
+def generateSchedule(companies, fixedints, allnames, panels, pair_c, pair_n, slots, slots_int, gdpanels, skipinitial, out, solver='gurobi',
+                     warmstart=None, blocks=False, aggregate=False, timer=None, threads=None, time_limit=None, mip_gap=None):
     print(datetime.now().time())
+    if timer is None:
+        timer = PhaseTimer()
     # Find out max number of panels
-    maxpanels = dict((c, max(panels[s][c] for s in slots)) for c in companies)
-    # Generate cost of slots
-    costs = dict((slots[s], s + 1) for s in range(len(slots)))
+    maxpanels = dict(zip(companies, panels.max(axis=0)))
+    cidx = dict((c, i) for i, c in enumerate(companies))
     # Calculate number shortlists for each students
-    crit = dict((n, sum(shortlists.get((c, n), 0) for c in companies)) for n in names)
+    crit = np.bincount(pair_n, minlength=len(allnames))
+    all_c, all_n = pair_c, pair_n
     # Remove names who dont have any shortlists
-    names = [key for key, value in crit.items() if value > 2]
-    buffernames = [key for key, value in crit.items() if value <= 2]
+    buffernames = [(i, n) for i, (n, v) in enumerate(zip(allnames, crit)) if v <= 2]
+    names, pair_c, pair_n = drop_names(allnames, pair_c, pair_n, [n for i, n in buffernames])
     # Calculate number shortlists per company
-    compshortlists = dict((c, sum(shortlists.get((c, n), 0) for n in names)) for c in companies)
+    compshortlists = dict(zip(companies, np.bincount(pair_c, minlength=len(companies))))
     # Calculate total number of panels per company
-    comppanels = dict((g[0], int(sum(panels[s][c] for s in slots for c in g) / slots_int.get(g[0], 1))) for g in gdpanels)
+    comppanels = dict((g[0], int(sum(panels[:, cidx[c]].sum() for c in g) / slots_int[cidx[g[0]]])) for g in gdpanels)
 
     for c in gdpanels:
         if compshortlists[c[0]] > comppanels[c[0]]:
             print(c[0] + " has shortlists greater than no of panels " + str(compshortlists[c[0]]) + " > " + str(comppanels[c[0]]))
 
     print('Creating IPLP')
-    model = Model('interviews')
-    compnames = tuplelist([(c, n) for c, n in shortlists.keys() if n in names])
-    choices = model.addVars(slots, compnames, vtype=GRB.BINARY, name='G')
-    # Objective - allocate max students to the initial few slots
-    model.setObjective(quicksum(choices[s, c, n] * costs[s] for s in slots for c, n in compnames), GRB.MINIMIZE)
-    # Constraint - maximum number in a slot for a club is limited by panels
-    model.addConstrs((choices.sum(s, c, '*') <= panels[s][c] for s in slots for c in companies))
-    # Constraint - allocate student only if he has a shortlist
-    model.addConstrs((choices.sum('*', c, n) <= shortlists.get((c[0], n), 0) * slots_int.get(c[0], 1) for n in names for c in gdpanels))
-    # Constraint - slots should not conflict for a student
-    model.addConstrs((choices.sum(s, '*', n) <= 1 for s in slots for n in names))
+    compnames = [(companies[c], names[n]) for c, n in zip(pair_c, pair_n)]
+    gdlist = list(gdpanels)
+    groupof = dict((c, gi) for gi, g in enumerate(gdlist) for c in g)
     # Constraint - allocate all students or number of interviews possible
-    model.addConstrs((choices.sum('*', c, '*') == min(compshortlists[c[0]], comppanels[c[0]]) * slots_int.get(c[0], 1) for c in gdpanels))
-    # Constraint - for multiple slots per interview, same candidate should be allocated
-    for c, si in slots_int.items():
-
-        start_slot = 0
-        while panels[slots[start_slot]][c] == 0:
-            start_slot += 1
-
-        if si > 1:
-            for i in range(si - 1 + start_slot, len(slots), si):
-                for x, n in compnames.select(c, '*'):
-                    for j in range(i - si + 1, i):
-                        model.addConstr((choices[slots[i], c, n] - choices[slots[j], c, n]), GRB.EQUAL, 0)
-
-    flist = [(s, c, n) for s, vals in fixedints.items() for c, n in vals.items() if (c, n) in compnames]
-    model.addConstrs((choices[s, c, n] == 1 for s, c, n in flist))
-
-    model.addConstrs((choices.sum(slots[0], c, n) == 0 for c in companies for n in skipinitial))
+    demand = [min(compshortlists[g[0]], comppanels[g[0]]) * slots_int[cidx[g[0]]] for g in gdlist]
+    pairid = dict((cn, i) for i, cn in enumerate(compnames))
+    sidx = dict((s, i) for i, s in enumerate(slots))
+    flist = [(sidx[s], pairid[c, n]) for s, vals in fixedints.items() for c, n in vals.items() if (c, n) in pairid]
+    skipset = set(skipinitial)
+    zlist = [(0, i) for i, (c, n) in enumerate(compnames) if n in skipset]
+    groupno = np.asarray([groupof[c] for c in companies], dtype=np.int64)
+    timer.lap('statistics')
+    timer.record(solver=solver, slots=len(slots), companies=len(companies), names=len(names), pairs=len(compnames))
+    if aggregate:
+        # Summed panels are blocked from the earliest clone, clones opening out of step with it would lose blocks
+        bs = first_panel_slots(panels)
+        mixed = [g[0] for g in gdlist if len(set(bs[cidx[c]] % slots_int[cidx[c]] for c in g if bs[cidx[c]] < len(slots))) > 1]
+        if mixed:
+            print('Panels of ' + ', '.join(mixed) + ' open in differently aligned slots, solving the clone model instead')
+            aggregate = False
+    if aggregate:
+        # One company per GD with the panels of all its clones, the clones are numbered after solving
+        members = [[cidx[c] for c in g] for g in gdlist]
+        usable = block_panels(panels, slots_int)
+        gpanels = np.stack([usable[:, m].sum(axis=1) for m in members], axis=1)
+        gsi = slots_int[[m[0] for m in members]]
+        # GD shortlists are the names shortlisted by all of its clones
+        key = groupno[pair_c] * len(names) + pair_n
+        full = np.bincount(key, minlength=len(gdlist) * len(names))[key] == np.asarray([len(m) for m in members])[groupno[pair_c]]
+        gsel = np.flatnonzero(full & np.isin(pair_c, [m[0] for m in members]))
+        gpair_c, gpair_n = groupno[pair_c[gsel]], pair_n[gsel]
+        # (GD, name) -> aggregated pair and (company, name) -> clone pair lookups
+        gid = np.full((len(gdlist), len(names)), -1, dtype=np.int64)
+        gid[gpair_c, gpair_n] = np.arange(len(gsel))
+        pid = np.full((len(companies), len(names)), -1, dtype=np.int64)
+        pid[pair_c, pair_n] = np.arange(len(compnames))
+        gfixed = [(s, gid[groupno[pair_c[p]], pair_n[p]]) for s, p in flist]
+        gforbid = [(s, gid[groupno[pair_c[p]], pair_n[p]]) for s, p in zlist]
+        sm = build_model(slots, [g[0] for g in gdlist], names, gpanels, gpair_c, gpair_n, gsi, demand=demand,
+                         fixed=[(s, p) for s, p in gfixed if p >= 0], forbid=[(s, p) for s, p in gforbid if p >= 0], blocks=blocks)
+        if warmstart:
+            warmstart = [(s, gdlist[groupof[c]][0], n) for s, c, n in warmstart if c in groupof]
+    else:
+        sm = build_model(slots, companies, names, panels, pair_c, pair_n, slots_int, groups=groupno, demand=demand, fixed=flist, forbid=zlist,
+                         blocks=blocks)
+    print(str(sm.num_vars) + ' variables, ' + str(sm.num_rows) + ' constraints')
+    print('Preprocessing removed ' + str(sm.removed['variables']) + ' variables and ' + str(sm.removed['rows']) + ' constraints')
+    timer.lap('model build')
 
     print('Optimising')
-    model.optimize()
-    solution = model.getAttr('X', choices)
-
-    sche = [['Slot'] + [c for c in companies for j in range(int(maxpanels[c]))]]
-
-    for s in slots:
-        temp = [s]
-        for c in companies:
-            row = [''] * int(maxpanels[c])
-            i = 0
-            for n in [name for com, name in compnames if com == c]:
-                if solution.get((s, c, n), 0):
-                    row[i] = n
-                    i = i + 1
-            temp = temp + row
-        sche.append(temp)
-
-    schedf = pd.DataFrame(sche)
-    schedf.to_csv(out + '\\sche.csv', index=False, header=False)
-
-    namesdf = pd.DataFrame.from_dict(dict((s, {n: c for c in companies for n in names if solution.get((s, c, n), 0)}) for s in slots), orient='index')
-    namesdf.sort_index(axis=1).to_csv(out + '\\names.csv')
-
-    pd.DataFrame([[c[0]] + [n for n in buffernames if shortlists.get((c[0], n), 0)] for c in gdpanels]).to_csv(out + '\\buff.csv', index=False,
-                                                                                                               header=False)
-
-    tl = [(n, c[0], 1, i + 1) for c in gdpanels for i, dc in enumerate(c) for n in names if solution.get((slots[0], dc, n), 0)]
-
-    sl = pd.DataFrame(tl, columns=['Name', 'Company', 'Round', 'Panel'])
+    start = None
+    if warmstart:
+        start = sm.vector(warmstart)
+        print('Warm start with ' + str(int(start.sum())) + ' of ' + str(len(warmstart)) + ' previous allocations')
+    timer.lap('start')
+    x, status = solve(sm, solver, start=start, threads=threads, time_limit=time_limit, mip_gap=mip_gap)
+    timer.lap('solve')
+    if len(x) != sm.num_vars:
+        print('No schedule found, ' + str(status))
+    else:
+        print('Objective ' + str(sm.objective) + ' bound ' + str(sm.bound) + ' gap ' + str(round(100 * sm.gap, 2)) + '%')
+    timer.record(model=dict(variables=sm.num_vars, rows=sm.num_rows, nonzeros=sm.nnz, phases=phase_totals(sm.timings),
+                            families=dict((f, end - begin) for f, begin, end in sm.families), removed=sm.removed))
+    alloc_s, alloc_p = sm.allocated(x)
+    if aggregate:
+        # Keep fixed candidates on the panel they were fixed to
+        pinned = np.full((len(slots), len(gsel)), -1, dtype=np.int64)
+        for s, p in flist:
+            if gid[groupno[pair_c[p]], pair_n[p]] >= 0:
+                pinned[s, gid[groupno[pair_c[p]], pair_n[p]]] = pair_c[p]
+        pinned = pinned[alloc_s, alloc_p]
+        clone = number_panels(alloc_s, gpair_c[alloc_p], gpair_n[alloc_p], members, usable, gsi, first_panel_slots(gpanels), pinned)
+        alloc_p = pid[clone, gpair_n[alloc_p]]
+
+    schedf = schedule_frame(slots, companies, [maxpanels[c] for c in companies], names, pair_c, pair_n, alloc_s, alloc_p, numbered=False)
+    schedf.to_csv(out + '\\sche.csv')
+
+    namesdf = names_frame(slots, companies, names, pair_c, pair_n, alloc_s, alloc_p)
+    namesdf.to_csv(out + '\\names.csv')
+
+    # Buffer names shortlisted by the first company of each GD
+    inbuff = (crit <= 2)[all_n]
+    buff = pd.DataFrame([[c[0]] + [allnames[i] for i in np.sort(all_n[inbuff & (all_c == cidx[c[0]])])] for c in gdpanels])
+    buff.to_csv(out + '\\buff.csv', index=False, header=False)
+
+    # GD and panel number of each company
+    groupno = np.asarray([groupof[c] for c in companies], dtype=np.int64)
+    panelno = np.asarray([gdlist[groupof[c]].index(c) for c in companies], dtype=np.int64)
+    p = alloc_p[alloc_s == 0]
+    order = np.lexsort((pair_n[p], panelno[pair_c[p]], groupno[pair_c[p]]))
+    c, n = pair_c[p][order], pair_n[p][order]
+    sl = pd.DataFrame({'Name': np.asarray(names, dtype=object)[n], 'Company': [gdlist[g][0] for g in groupno[c]], 'Round': 1,
+                       'Panel': panelno[c] + 1})
     sl.sort_values(['Company', 'Panel']).to_csv(out + '\\staticupload.csv', index=False)
-    print(model.status)
+    timer.lap('output')
+    print(status)
     print(datetime.now().time())
+    timer.record(status=str(status), objective=sm.objective, bound=sm.bound, gap=sm.gap)
+    timer.write(out + '\\timing.json')
 
 
 if __name__ == "__main__":
@@ -153,10 +212,28 @@ if __name__ == "__main__":
     parser.add_argument('-f', '--fixed', help='CSV of the schedule with pre fixed candidates. Should satisfy constraints', metavar='fixed.csv')
     parser.add_argument('-o', '--output', help='Output directory', default='out')
     parser.add_argument('-s', '--skipinitial', help='Skip initial few slots', metavar='skip.csv')
+    parser.add_argument('-w', '--warm-start', help='names.csv of a previous run used as the MIP start', metavar='names.csv')
+    parser.add_argument('--formulation', help='One variable per slot with contiguity constraints or one variable per GD block',
+                        choices=['slots', 'blocks'], default='slots')
+    parser.add_argument('--aggregate-panels', help='Model each GD as one company with the panels of all its clones and number the panels '
+                        'after solving, unless its clones open in differently aligned slots', action='store_true')
+    parser.add_argument('--solver', help='MIP solver backend', choices=SOLVERS, default='gurobi')
+    parser.add_argument('--time-limit', help='Seconds after which the solver stops with the best schedule found', type=float)
+    parser.add_argument('--mip-gap', help='Relative gap between the schedule and the bound at which the solver stops', type=float)
+    parser.add_argument('--threads', help='Solver threads, defaults to the solver default', type=int)
+    parser.add_argument('--engine', help='CSV parser engine', choices=['c', 'pyarrow'], default='c')
+    parser.add_argument('--profile', help='Run under cProfile, write profile.prof to the output directory and print the slowest calls',
+                        action='store_true')
 
     args = parser.parse_args()
-    shortlists, companies, names = read_shortlists(args.shortlists)
-    panels, comp2, slots = read_input_csv(args.slotspanels)
+    profiler = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    timer = PhaseTimer()
+    companies, names, pair_c, pair_n = load_shortlists(args.shortlists, lower=True, engine=args.engine)
+    panelsdf = load_frame(args.slotspanels, lower=True, engine=args.engine)
+    comp2, slots = list(panelsdf.columns), list(panelsdf.index)
     print('Number of Companies')
     print(len(companies))
     print('Number of Candidates')
@@ -165,16 +242,20 @@ if __name__ == "__main__":
     print(len(slots))
     assert (sorted(companies) == sorted(comp2))
 
-    if len([x for vals in panels.values() for x in vals.values() if not np.issubdtype(x, int) or x < 0]):
+    panels = panelsdf[companies].to_numpy()
+    if not np.issubdtype(panels.dtype, np.integer) or (panels < 0).any():
         raise ValueError('The number of panels must be a positive integer ')
 
-    slots_int = read_slots_interviews(args.slotsgd)
-    assert (sorted(slots_int.keys()) == sorted(companies))
+    sidict = load_slots_interviews(args.slotsgd, lower=True, engine=args.engine)
+    assert (sorted(sidict.index) == sorted(companies))
+    slots_int = sidict[companies].to_numpy()
 
     gdpanels = read_gdPanels(args.gdslots)
     gdcomps = [y for x in gdpanels for y in x]
     assert (sorted(companies) == sorted(gdcomps))
 
+    timer.lap('read')
+
     fixedints = dict()
     if args.fixed:
         fixedints, clubs4, slots2 = read_input_csv(args.fixed, typ=object)
@@ -182,7 +263,7 @@ if __name__ == "__main__":
     lp = list()
     if args.leftprocess:
         lp = read_lp(args.leftprocess)
-        names = [n for n in names if n not in lp]
+        names, pair_c, pair_n = drop_names(names, pair_c, pair_n, lp)
 
     skip = list()
     if args.skipinitial:
@@ -191,4 +272,15 @@ if __name__ == "__main__":
     if not os.path.exists(args.output):
         os.makedirs(args.output)
 
-    generateSchedule(companies, fixedints, names, panels, shortlists, slots, slots_int, gdpanels, skip, args.output)
+    warmstart = None
+    if args.warm_start:
+        warmstart = load_names_schedule(args.warm_start, lower=True)
+    timer.lap('validation')
+
+    generateSchedule(companies, fixedints, names, panels, pair_c, pair_n, slots, slots_int, gdpanels, skip, args.output, args.solver, warmstart,
+                     args.formulation == 'blocks', args.aggregate_panels, timer, args.threads, args.time_limit, args.mip_gap)
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.output + '\\profile.prof')
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
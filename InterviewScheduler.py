@@ -5,11 +5,25 @@
     Python Version: 3.6
 """
 import argparse
+import cProfile
 import datetime
+import os
+import pstats
 
 import numpy as np
 import pandas as pd
-from gurobipy import *
+
+from FeasibilityCheck import precheck
+from FlowScheduler import matching_schedule
+from GreedyScheduler import greedy_schedule
+from InputCache import input_key, load_snapshot, save_snapshot, snapshot_path
+from InputLoader import drop_names, load_frame, load_names_schedule, load_shortlists, load_slots_interviews
+from ModelBuilder import SOLVERS, block_capacity, build_model, freeze_slots, objective_coefficients, pair_ranks, solve
+from ModelStore import load_model, model_key, model_path, save_model, save_state
+from OutputWriter import IncumbentWriter, names_frame, schedule_frame, write_atomic
+from PhaseTimer import PhaseTimer, phase_totals
+from PreferenceCheck import preference_violations
+from RollingHorizon import lp_bound, objective_value, rolling_schedule
 
 
 def read_input_csv(filename, typ=None):
@@ -20,21 +34,6 @@ def read_input_csv(filename, typ=None):
     return sldf.to_dict('index'), sorted(sldf.columns.values), list(sldf.index.values)
 
 
-def read_slots_interviews(filename):
-    sidf = pd.read_csv(filename, dtype=object)
-    sidf.columns = sidf.columns.str.strip()
-    sidict = sidf.to_dict('list')
-    return dict((key, int(v[0])) for key, v in sidict.items())
-
-
-def read_shortlists(filename):
-    sldf = pd.read_csv(filename, dtype=object)
-    sldf.columns = sldf.columns.str.strip()
-    comps = list(sldf.columns.values)
-    comtupl = [(c, str(n).strip()) for c in comps for n in list(sldf[c].dropna().values)]
-    return dict((x, 1) for x in comtupl), sorted(comps), sorted(set([x[1] for x in comtupl]))
-
-
 def read_lp(filename):
     exnames = []
     with open(filename) as f:
@@ -44,124 +43,285 @@ def read_lp(filename):
     return sorted(set(exnames))
 
 
-def generateSchedule(companies, fixedints, allnames, panels, prefs, shortlists, slots, slots_int, out):
+def read_inputs(shortlistsfile, slotspanelsfile, slotsintfile=None, prefsfile=None, engine='c'):
+    shcompanies, names, pair_c, pair_n = load_shortlists(shortlistsfile, engine=engine)
+
+    panelsdf = load_frame(slotspanelsfile, engine=engine)
+    companies, slots = list(panelsdf.columns), list(panelsdf.index)
+    print(set(companies) ^ set(shcompanies))
+    if not set(companies).issubset(set(shcompanies)):
+        raise ValueError('Shortlists are not present for all companies')
+
+    panels = panelsdf.to_numpy()
+    if not np.issubdtype(panels.dtype, np.integer) or (panels < 0).any():
+        raise ValueError('The number of panels must be a positive integer ')
+
+    # Shortlists of companies without panels are not scheduled
+    cpos = np.array([companies.index(c) if c in companies else -1 for c in shcompanies])[pair_c]
+    pair_c, pair_n = cpos[cpos >= 0], pair_n[cpos >= 0]
+
+    slots_int = np.ones(len(companies), dtype=int)
+    if slotsintfile:
+        sidict = load_slots_interviews(slotsintfile, engine=engine)
+        assert (sorted(sidict.index) == sorted(companies))
+        slots_int = sidict[companies].to_numpy()
+
+    prefs = None
+    if prefsfile:
+        prefsdf = load_frame(prefsfile, engine=engine)
+        comps3 = list(prefsdf.columns)
+        bad = ~np.isin(prefsdf.to_numpy(), np.arange(1, len(shcompanies) + 1))
+        if bad.any():
+            val = prefsdf.to_numpy()[bad][0]
+            raise ValueError('Incorrect preference ' + str(val) + '. It should be between 1 and ' + str(len(shcompanies)))
+        assert (set(companies).issubset(set(comps3)))
+        assert (shcompanies == comps3)
+        # Names without preferences are kept as NaN rows and rejected once the candidates who left are removed
+        prefs = prefsdf.reindex(index=names, columns=companies).to_numpy(dtype=float)
+
+    return dict(shcompanies=shcompanies, companies=companies, names=names, slots=slots, pair_c=pair_c, pair_n=pair_n, panels=panels,
+                slots_int=slots_int, prefs=prefs)
+
+
+def remove_left_process(names, pair_c, pair_n, prefs, lp):
+    if prefs is not None:
+        prefs = prefs[~np.isin(np.asarray(names, dtype=object), lp)]
+    names, pair_c, pair_n = drop_names(names, pair_c, pair_n, lp)
+
+    if prefs is not None:
+        missing = set(n for n, row in zip(names, prefs) if np.isnan(row).any())
+        if len(missing):
+            print('Preferences are missing for below names')
+            print(missing)
+            raise ValueError('Some names are mssing')
+    return names, pair_c, pair_n, prefs
+
+
+def generateSchedule(companies, fixedints, allnames, panels, prefs, pair_c, pair_n, slots, slots_int, out, solver='gurobi', warmstart=None,
+                     from_slot=None, method='mip', window=5, lookahead=2, greedy_start=False, threads=None, blocks=False, timer=None,
+                     time_limit=None, mip_gap=None, incumbent_interval=None, write_model=False, from_model=False,
+                     state=False):
     print(datetime.datetime.now().time())
+    if timer is None:
+        timer = PhaseTimer()
     # Find out max number of panels
-    maxpanels = dict((c, max(panels[s][c] for s in slots)) for c in companies)
-    # Generate cost of slots
-    costs = dict((slots[s], s + 1) for s in range(len(slots)))
+    maxpanels = dict(zip(companies, panels.max(axis=0)))
     # Calculate number shortlists for each students
-    crit = dict((n, sum(shortlists.get((c, n), 0) for c in companies)) for n in allnames)
+    crit = np.bincount(pair_n, minlength=len(allnames))
     # Remove names who dont have any shortlists
-    names = [key for key, value in crit.items() if value > 0]
+    names, pair_c, pair_n = drop_names(allnames, pair_c, pair_n, [n for n, v in zip(allnames, crit) if v == 0])
+    if prefs is not None:
+        prefs = prefs[crit > 0]
+    crit = crit[crit > 0]
     # Calculate number shortlists per company
-    compshortlists = dict((c, sum(shortlists.get((c, n), 0) for n in names)) for c in companies)
+    compshortlists = np.bincount(pair_c, minlength=len(companies))
     # Calculate total number of panels per company
-    comppanels = dict((c, int(sum(panels[s][c] for s in slots) / slots_int.get(c, 1))) for c in companies)
+    comppanels = panels.sum(axis=0) // slots_int
+    if blocks:
+        # Only whole interview blocks can be allocated
+        comppanels = block_capacity(panels, slots_int)
 
-    for c in companies:
-        if compshortlists[c] > comppanels[c]:
-            print(c + " has shortlists greater than no of panels " + str(compshortlists[c]) + " > " + str(comppanels[c]))
+    for c, cs, cp in zip(companies, compshortlists, comppanels):
+        if cs > cp:
+            print(c + " has shortlists greater than no of panels " + str(cs) + " > " + str(cp))
 
     fibonacii = [2, 3]
-    for i in range(2, 1 + int(max(crit.values()))):
+    for i in range(2, 1 + int(crit.max(initial=0))):
         fibonacii.append(fibonacii[i - 1] + fibonacii[i - 2])
 
-    # Create Objective Coefficients
-    prefsnew = dict()
-    objcoeff = dict()
-
-    if len(prefs):
-        for n in names:
-            actpref = dict((c, prefs[n][c] * shortlists.get((c, n), 0)) for c in companies if shortlists.get((c, n), 0) > 0)
-            scaledpref = {key: rank for rank, key in enumerate(sorted(actpref, key=actpref.get), 1)}
-
-            for c, rank in scaledpref.items():
-                prefsnew[n, c] = rank
-                for s in slots:
-                    if compshortlists[c] > comppanels[c]:
-                        objcoeff[s, c, n] = (rank / (crit[n] + 1)) * (len(slots) + 1 - costs[s])
-                    else:
-                        objcoeff[s, c, n] = (1 - rank / (crit[n] + 1)) * costs[s]
-
     print('Creating IPLP')
-    model = Model('interviews')
-    compnames = tuplelist([(c, n) for c, n in shortlists.keys() if n in names and c in companies])
-    choices = model.addVars(slots, compnames, vtype=GRB.BINARY, name='G')
-    # Objective - allocate max students to the initial few slots
-    model.setObjective(quicksum(choices[s, c, n] * objcoeff.get((s, c, n), costs[s]) for s in slots for c, n in compnames), GRB.MINIMIZE)
-    # Constraint - maximum number in a slot for a club is limited by panels
-    model.addConstrs((choices.sum(s, c, '*') <= panels[s][c] for s in slots for c in companies))
-    # Constraint - allocate student only if he has a shortlist
-    model.addConstrs((choices.sum('*', c, n) <= shortlists.get((c, n), 0) * slots_int.get(c, 1) for n in names for c in companies))
-    # Constraint - slots should not conflict for a student
-    model.addConstrs((choices.sum(s, '*', n) <= 1 for s in slots for n in names))
-    # Constraint - allocate all students or number of interviews possible
-    model.addConstrs((choices.sum('*', c, '*') == min(compshortlists[c], comppanels[c]) * slots_int.get(c, 1) for c in companies))
-    # Constraint - for multiple slots per interview, same candidate should be allocated
-    for c, si in slots_int.items():
+    compnames = [(companies[c], names[n]) for c, n in zip(pair_c, pair_n)]
 
-        start_slot = 0
-        while panels[slots[start_slot]][c] == 0:
-            start_slot += 1
+    # Create Objective Coefficients - allocate max students to the initial few slots
+    prefsnew = None
+    obj = np.broadcast_to(np.arange(1.0, len(slots) + 1), (len(compnames), len(slots)))
 
-        if si > 1:
-            for i in range(si - 1 + start_slot, len(slots), si):
-                for x, n in compnames.select(c, '*'):
-                    for j in range(i - si + 1, i):
-                        model.addConstr((choices[slots[i], c, n] - choices[slots[j], c, n]), GRB.EQUAL, 0)
+    if prefs is not None:
+        rank = pair_ranks(pair_c, pair_n, prefs[pair_n, pair_c])
+        obj = objective_coefficients(rank, crit[pair_n], (compshortlists > comppanels)[pair_c], len(slots))
+        prefsnew = np.zeros((len(names), len(companies)))
+        prefsnew[pair_n, pair_c] = rank
 
+    # Constraint - allocate all students or number of interviews possible
+    demand = np.minimum(compshortlists, comppanels) * slots_int
     # Constraint - Fix manually given schedule
-    flist = [(s, c, n) for s, vals in fixedints.items() for c, n in vals.items() if (c, n) in compnames]
-    model.addConstrs((choices[s, c, n] == 1 for s, c, n in flist))
-
-    print('Optimising')
-    model.optimize()
-    solution = model.getAttr('X', choices)
-
-    sche = [['Slot'] + [c + str(j + 1) for c in companies for j in range(int(maxpanels[c]))]]
-
-    for s in slots:
-        temp = [s]
-        for c in companies:
-            row = [''] * int(maxpanels[c])
-            i = 0
-            for n in [name for com, name in compnames if com == c]:
-                if solution.get((s, c, n), 0):
-                    row[i] = n
-                    i = i + 1
-            temp = temp + row
-        sche.append(temp)
-
-    schedf = pd.DataFrame(sche)
-    schedf.to_csv(out + '\\sche.csv', index=False, header=False)
-
-    namesdf = pd.DataFrame.from_dict(dict((s, {n: c for c in companies for n in names if solution.get((s, c, n), 0)}) for s in slots), orient='index')
-    namesdf.sort_index(axis=1).to_csv(out + '\\names.csv')
-
-    print(model.status)
+    pairid = dict((cn, i) for i, cn in enumerate(compnames))
+    sidx = dict((s, i) for i, s in enumerate(slots))
+    flist = [(sidx[s], pairid[c, n]) for s, vals in fixedints.items() for c, n in vals.items() if (c, n) in pairid]
+    past = dict()
+    first = 0
+    if from_slot:
+        # Freeze the slots before from_slot to the previous schedule and optimise the remaining horizon only
+        first = sidx[from_slot]
+        past = dict(((s, c, n), 1) for s, c, n in warmstart if s in sidx and sidx[s] < first and (c, n) in pairid)
+        print('Freezing ' + str(len(past)) + ' allocations before ' + from_slot)
+    pastidx = [(sidx[s], pairid[c, n]) for s, c, n in past]
+
+    def write_outputs(alloc_s, alloc_p):
+        write_atomic(schedule_frame(slots, companies, [maxpanels[c] for c in companies], names, pair_c, pair_n, alloc_s, alloc_p),
+                     out + '\\sche.csv')
+        write_atomic(names_frame(slots, companies, names, pair_c, pair_n, alloc_s, alloc_p), out + '\\names.csv')
+
+    timer.lap('statistics')
+    timer.record(method=method, solver=solver, slots=len(slots), companies=len(companies), names=len(names), pairs=len(compnames))
+
+    if method == 'rolling':
+        print('Optimising in windows of ' + str(window) + ' slots')
+        allocations = rolling_schedule(slots, companies, names, panels, pair_c, pair_n, slots_int, demand, obj, flist, window, lookahead, solver,
+                                       pastidx, first, threads, blocks, time_limit, mip_gap)
+        timer.lap('rolling')
+        value = objective_value(obj, allocations)
+        bound = lp_bound(slots, companies, names, panels, pair_c, pair_n, slots_int, demand, obj, flist + pastidx, solver, threads, blocks,
+                         time_limit)
+        timer.lap('lp bound')
+        status = 'Objective ' + str(value) + ' LP bound ' + str(bound) + ' gap ' + str(round(100 * (value - bound) / max(abs(value), 1e-9), 2)) + '%'
+    elif method == 'greedy':
+        print('Allocating greedily')
+        allocations = greedy_schedule(panels, pair_c, pair_n, len(names), slots_int, demand, obj, flist + pastidx, first)
+        timer.lap('greedy')
+        left = demand - np.bincount(pair_c[[p for s, p in allocations]], minlength=len(companies))
+        status = 'Objective ' + str(objective_value(obj, allocations)) + ' with ' + str(int(left.sum())) + ' slots left unallocated'
+    else:
+        kept = np.arange(len(compnames))
+        if from_slot:
+            keep, block_start, fdemand, fixed, forbid = freeze_slots(panels, pair_c, slots_int, pastidx, first)
+            kept = np.flatnonzero(keep)
+            newidx = np.cumsum(keep) - 1
+            fixed += [(s - first, newidx[p]) for s, p in flist if s >= first and keep[p]]
+            print(str(int((~keep).sum())) + ' interviews completed')
+            inputs = dict(slots=slots[first:], panels=panels[first:], pair_c=pair_c[keep], pair_n=pair_n[keep], demand=fdemand, fixed=fixed,
+                          forbid=forbid, block_start=block_start)
+            objective = obj[keep][:, first:]
+        else:
+            inputs = dict(slots=slots, panels=panels, pair_c=pair_c, pair_n=pair_n, demand=demand, fixed=flist)
+            objective = obj
+
+        errors, warnings = precheck(companies=companies, names=names, slots_int=slots_int, blocks=blocks, **inputs)
+        timer.lap('precheck')
+        for w in warnings:
+            print(w)
+        if errors:
+            print('The model is infeasible, not optimising')
+            for e in errors:
+                print(e)
+            unscheduled = dict(zip(companies, np.bincount(pair_c, minlength=len(companies)).tolist()))
+            timer.write(out + '\\timing.json')
+            return dict(status='Infeasible', objective=float('nan'), unscheduled=unscheduled, violations=0, magnitude=0)
+
+        matched, optimal = None, False
+        if prefs is None and (np.asarray(slots_int) == 1).all() and not greedy_start:
+            # Single slot interviews all cost their slot number, so each slot is an assignment of panels to candidates. The MIP
+            # is only needed when the slot matching misses the demand or the seat bound
+            mfixed = pastidx + [(s, p) for s, p in flist if s >= first and panels[s, pair_c[p]] > 0]
+            matched, bound = matching_schedule(panels, pair_c, pair_n, len(names), demand, mfixed, first)
+            value = objective_value(obj, matched)
+            met = (np.bincount(pair_c[[p for s, p in matched]], minlength=len(companies)) >= demand).all()
+            print('Slot matching objective ' + str(value) + ' bound ' + str(bound) + ('' if met else ' with demand left unallocated'))
+            optimal = met and value <= bound + 1e-6
+            timer.lap('matching')
+            if optimal:
+                allocations, status = [a for a in matched if a[0] >= first] + pastidx, 'Optimal (slot matching)'
+                if warmstart and not from_slot:
+                    print('The slot matching schedule is optimal, the --warm-start schedule is not used')
+
+        if not optimal:
+            # Stored models are named after the model inputs
+            base = model_path(out, model_key(companies=companies, names=names, slots_int=slots_int, obj=objective, blocks=blocks, **inputs))
+            if from_model and os.path.exists(base + '.npz'):
+                sm = load_model(base)[0]
+                print('Model loaded from ' + base + '.mps.gz')
+                timer.lap('model load')
+            else:
+                if from_model:
+                    print('No model stored for these inputs in ' + out + ', building it')
+                sm = build_model(companies=companies, names=names, slots_int=slots_int, obj=objective, blocks=blocks, **inputs)
+                print('Preprocessing removed ' + str(sm.removed['variables']) + ' variables and ' + str(sm.removed['rows']) + ' constraints')
+                timer.lap('model build')
+                if write_model:
+                    save_model(sm, base, [maxpanels[c] for c in companies])
+                    print('Model written to ' + base + '.mps.gz')
+                    timer.lap('model write')
+            print(str(sm.num_vars) + ' variables, ' + str(sm.num_rows) + ' constraints')
+
+            print('Optimising')
+            start = None
+            if matched is not None and not warmstart:
+                start = sm.vector([(slots[s],) + compnames[p] for s, p in matched if s >= first])
+                print('Slot matching start with ' + str(int(start.sum())) + ' allocations')
+            elif greedy_start:
+                allocations = greedy_schedule(panels, pair_c, pair_n, len(names), slots_int, demand, obj, flist + pastidx, first)
+                start = sm.vector([(slots[s],) + compnames[p] for s, p in allocations])
+                print('Greedy start with ' + str(int(start.sum())) + ' allocations')
+            elif warmstart:
+                # A given warm start is kept over the slot matching schedule
+                start = sm.vector(warmstart)
+                print('Warm start with ' + str(int(start.sum())) + ' of ' + str(len(warmstart)) + ' previous allocations' +
+                      ('' if matched is None else ', the slot matching schedule is not used as the start'))
+            timer.lap('start')
+            writer = None
+            if incumbent_interval is not None:
+                # Rewrite sche.csv and names.csv with the improving schedules found during the solve
+                def write_incumbent(xi, value):
+                    s, p = sm.allocated(xi)
+                    found = list(zip((s + first).tolist(), kept[p].tolist())) + pastidx
+                    write_outputs(*np.asarray(found, dtype=np.int64).reshape(-1, 2).T)
+                    print('Schedule with objective ' + str(value) + ' written')
+
+                writer = IncumbentWriter(write_incumbent, incumbent_interval)
+                if solver == 'pulp':
+                    print('PuLP has no incumbent callback, only the final schedule is written')
+            x, status = solve(sm, solver, start=start, threads=threads, time_limit=time_limit, mip_gap=mip_gap, on_incumbent=writer)
+            if writer is not None:
+                writer.close()
+            timer.lap('solve')
+            if len(x) != sm.num_vars:
+                print('No schedule found, ' + str(status))
+            else:
+                print('Objective ' + str(sm.objective) + ' bound ' + str(sm.bound) + ' gap ' + str(round(100 * sm.gap, 2)) + '%')
+            alloc_s, alloc_p = sm.allocated(x)
+            allocations = list(zip((alloc_s + first).tolist(), kept[alloc_p].tolist())) + pastidx
+            timer.record(bound=sm.bound, gap=sm.gap, model=dict(variables=sm.num_vars, rows=sm.num_rows, nonzeros=sm.nnz,
+                                                               phases=phase_totals(sm.timings),
+                                                               families=dict((f, end - begin) for f, begin, end in sm.families), removed=sm.removed))
+
+    alloc_s, alloc_p = np.asarray(allocations, dtype=np.int64).reshape(-1, 2).T
+    write_outputs(alloc_s, alloc_p)
+    timer.lap('output')
+    if state and (method != 'mip' or from_slot):
+        print('The state file is only written with --method mip without --from-slot')
+    elif state:
+        # Everything ScheduleService needs to take candidates out of this schedule, the model is left out when slot matching solved it
+        save_state(out + '\\state.npz', None if optimal else sm, alloc_s=alloc_s, alloc_p=alloc_p, companies=companies, names=names,
+                   slots=slots, panels=panels, pair_c=pair_c, pair_n=pair_n, slots_int=slots_int,
+                   rank=None if prefs is None else rank, fixed=np.asarray(flist, dtype=np.int64).reshape(-1, 2),
+                   active=np.ones(len(pair_c), dtype=bool), blocks=blocks, status=str(status),
+                   objective=None if optimal else sm.objective, bound=None if optimal else sm.bound)
+        print('State written to ' + out + '\\state.npz')
+        timer.lap('state')
+
+    print(status)
     print(datetime.datetime.now().time())
 
-    if prefsnew:
-        unordn = set()
-        for n in names:
-            init = 1
-            for s in slots:
-                stop = False
-                for c in companies:
-                    if solution.get((s, c, n), 0) == 1:
-                        if prefsnew[n, c] < init:
-                            unordn.add(n)
-                            stop = True
-                            break
-                        else:
-                            init = prefsnew[n, c]
-
-                if stop:
-                    break
+    unordn = set()
+    magnitude = 0
+    if prefsnew is not None:
+        count, drop = preference_violations(np.c_[pair_n[alloc_p], alloc_s, pair_c[alloc_p]], prefsnew)
+        unordn = set(names[i] for i in np.flatnonzero(count))
+        magnitude = float(drop.sum())
         print('The following candidates preference order has been violated')
         print(unordn)
         print(len(unordn))
+        print('Total rank drop ' + str(magnitude))
+    timer.lap('preferences')
+
+    interviewed = np.zeros(len(compnames), dtype=bool)
+    interviewed[alloc_p] = True
+    unscheduled = dict(zip(companies, np.bincount(pair_c[~interviewed], minlength=len(companies)).tolist()))
+    result = dict(status=str(status), objective=objective_value(obj, allocations), unscheduled=unscheduled, violations=len(unordn),
+                  magnitude=magnitude)
+    timer.record(status=result['status'], objective=result['objective'])
+    timer.write(out + '\\timing.json')
+    return result
 
 
 if __name__ == "__main__":
@@ -173,56 +333,87 @@ if __name__ == "__main__":
     parser.add_argument('-l', '--leftprocess', help='CSV with a list of candidates who have left the process', metavar='lp.csv')
     parser.add_argument('-f', '--fixed', help='CSV of the schedule with pre fixed candidates. Should satisfy constraints', metavar='fixed.csv')
     parser.add_argument('-o', '--output', help='Output directory', default='out')
+    parser.add_argument('-w', '--warm-start', help='names.csv of a previous run used as the MIP start', metavar='names.csv')
+    parser.add_argument('--from-slot', help='Keep the --warm-start schedule before this slot and reschedule the remaining slots only',
+                        metavar='Slots_07')
+    parser.add_argument('--method', help='Solve the whole model at once, in rolling windows of slots or with the greedy heuristic',
+                        choices=['mip', 'rolling', 'greedy'], default='mip')
+    parser.add_argument('--window', help='Slots committed per window with --method rolling', type=int, default=5)
+    parser.add_argument('--lookahead', help='Extra slots solved ahead of each window with --method rolling', type=int, default=2)
+    parser.add_argument('--greedy-start', help='Use the greedy heuristic schedule as the MIP start', action='store_true')
+    parser.add_argument('--formulation', help='One variable per slot with contiguity constraints or one variable per interview block',
+                        choices=['slots', 'blocks'], default='slots')
+    parser.add_argument('--solver', help='MIP solver backend', choices=SOLVERS, default='gurobi')
+    parser.add_argument('--time-limit', help='Seconds after which the solver stops with the best schedule found, per window with --method rolling',
+                        type=float)
+    parser.add_argument('--mip-gap', help='Relative gap between the schedule and the bound at which the solver stops', type=float)
+    parser.add_argument('--threads', help='Solver threads, defaults to the solver default', type=int)
+    parser.add_argument('--incumbent-interval', help='Rewrite sche.csv and names.csv with every improving schedule found during the solve, '
+                        'at most once in this many seconds', type=float, metavar='SECONDS')
+    parser.add_argument('--write-model', help='Store the built model as gzipped MPS with its variable mapping in the output directory',
+                        action='store_true')
+    parser.add_argument('--from-model', help='Solve the model stored by --write-model for the same inputs instead of building it',
+                        action='store_true')
+    parser.add_argument('--save-state', help='Write the model, schedule and inputs to state.npz in the output directory for '
+                        'ScheduleService --state', action='store_true')
+    parser.add_argument('--engine', help='CSV parser engine', choices=['c', 'pyarrow'], default='c')
+    parser.add_argument('--no-cache', help='Always parse the CSVs instead of using the input snapshot in the output directory', action='store_true')
+    parser.add_argument('--profile', help='Run under cProfile, write profile.prof to the output directory and print the slowest calls',
+                        action='store_true')
 
     args = parser.parse_args()
-    shortlists, shcompanies, names = read_shortlists(args.shortlists)
+    if args.from_slot and not args.warm_start:
+        parser.error('--from-slot needs the previous names.csv as --warm-start')
 
-    panels, companies, slots = read_input_csv(args.slotspanels)
+    if not os.path.exists(args.output):
+        os.makedirs(args.output)
+
+    profiler = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    timer = PhaseTimer()
+
+    cachefile = snapshot_path(args.output, input_key(args.shortlists, args.slotspanels, args.slotsint, args.prefs))
+    if not args.no_cache and os.path.exists(cachefile):
+        print('Loading inputs from ' + cachefile)
+        inputs = load_snapshot(cachefile)
+    else:
+        inputs = read_inputs(args.shortlists, args.slotspanels, args.slotsint, args.prefs, args.engine)
+        if not args.no_cache:
+            save_snapshot(cachefile, inputs)
+    timer.lap('read')
+
+    companies, names, slots = inputs['companies'], inputs['names'], inputs['slots']
+    pair_c, pair_n, panels, slots_int = inputs['pair_c'], inputs['pair_n'], inputs['panels'], inputs['slots_int']
+    prefs = inputs.get('prefs')
     print('Number of Companies')
     print(len(companies))
     print('Number of Candidates')
     print(len(names))
     print('Number of Slots')
     print(len(slots))
-    print(set(companies) ^ set(shcompanies))
-    if not set(companies).issubset(set(shcompanies)):
-        raise ValueError('Shortlists are not present for all companies')
-
-    if len([x for vals in panels.values() for x in vals.values() if not np.issubdtype(x, int) or x < 0]):
-        raise ValueError('The number of panels must be a positive integer ')
-
-    slots_int = dict()
-    if args.slotsint:
-        slots_int = read_slots_interviews(args.slotsint)
-        assert (sorted(slots_int.keys()) == sorted(companies))
 
     lp = list()
     if args.leftprocess:
         lp = read_lp(args.leftprocess)
-        names = [n for n in names if n not in lp]
-
-    prefs = dict()
-
-    if args.prefs:
-        prefs, comps3, names2 = read_input_csv(args.prefs)
-        for vals in prefs.values():
-            for val in vals.values():
-                if val not in range(1, len(shcompanies) + 1):
-                    raise ValueError('Incorrect preference ' + str(val) + '. It should be between 1 and ' + str(len(shcompanies)))
-        assert (set(companies).issubset(set(comps3)))
-        assert (shcompanies == comps3)
-
-        missing = set(names) - set(names2)
-        if len(missing):
-            print('Preferences are missing for below names')
-            print(missing)
-            raise ValueError('Some names are mssing')
+    names, pair_c, pair_n, prefs = remove_left_process(names, pair_c, pair_n, prefs, lp)
 
     fixedints = dict()
     if args.fixed:
         fixedints, comps4, slots2 = read_input_csv(args.fixed, typ=object)
 
-    if not os.path.exists(args.output):
-        os.makedirs(args.output)
+    warmstart = None
+    if args.warm_start:
+        warmstart = load_names_schedule(args.warm_start)
+    timer.lap('validation')
+
+    generateSchedule(companies, fixedints, names, panels, prefs, pair_c, pair_n, slots, slots_int, args.output, args.solver, warmstart,
+                     args.from_slot, args.method, args.window, args.lookahead, args.greedy_start,
+                     args.threads, args.formulation == 'blocks', timer, args.time_limit, args.mip_gap, args.incumbent_interval,
+                     args.write_model, args.from_model, args.save_state)
 
-    generateSchedule(companies, fixedints, names, panels, prefs, shortlists, slots, slots_int, args.output)
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.output + '\\profile.prof')
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
@@ -1,6 +1,10 @@
-from gurobipy import *
+import sys
 from datetime import datetime
 
+import numpy as np
+
+from ModelBuilder import build_model, pair_index, solve
+
 
 def read_input_csv(filename):
     row_header, matrix, col_header = list(), dict(), set()
@@ -110,36 +114,24 @@ if __name__ == "__main__":
 
     print('Creating IPLP')
 
-    model = Model('interviews')
-    choices = model.addVars(slots, clubs, names, vtype=GRB.BINARY, name='G')
+    compnames = [(c, n) for n in names for c in clubs if shortlists[n, c] > 0]
+    pair_c, pair_n = pair_index(clubs, names, compnames)
+    panelsarr = np.array([[panels[s, c] for c in clubs] for s in slots])
 
     # Objective - allocate max students to the initial few slots
-    model.setObjective(quicksum(choices[s, c, n] * objcoeff.get((s, c, n), 1) for s in slots for n in names for c in clubs), GRB.MINIMIZE)
-
-    # Constraint - maximum number in a slot for a club is limited by panels
-    model.addConstrs((choices.sum(s, c, '*') <= panels[s, c] for s in slots for c in clubs))
-
-    # Constraint - allocate student only if he has a shortlist
-    model.addConstrs((choices.sum('*', c, n) <= shortlists[n, c] * slots_int.get(c, 1) for n in names for c in clubs))
-
-    # Constraint - slots should not conflict for a student
-    model.addConstrs((choices.sum(s, '*', n) <= 1 for s in slots for n in names))
+    obj = np.array([[objcoeff.get((s, c, n), 1) for s in slots] for c, n in compnames]).reshape(len(compnames), len(slots))
 
     # Constraint - allocate all students or number of interviews possible
-    model.addConstrs((choices.sum('*', c, '*') == min(compshortlists[c], comppanels[c]) * slots_int.get(c, 1) for c in clubs))
+    demand = [min(compshortlists[c], comppanels[c]) * slots_int.get(c, 1) for c in clubs]
 
-    # Constraint - for multiple slots per interview, same candidate should be allocated
-    for c, si in slots_int.items():
-        if si > 1:
-            for i in range(si - 1, len(slots), si):
-                for n in names:
-                    for j in range(i - si + 1, i):
-                        model.addConstr((choices[slots[i], c, n] - choices[slots[j], c, n]), GRB.EQUAL, 0)
+    # Constraint - for multiple slots per interview, same candidate should be allocated. Blocks start at the first slot
+    sm = build_model(slots, clubs, names, panelsarr, pair_c, pair_n, [slots_int.get(c, 1) for c in clubs], demand=demand, obj=obj,
+                     block_start=np.zeros(len(clubs), dtype=int))
 
     print('Optimising')
-    model.optimize()
+    x, status = solve(sm, 'gurobi')
 
-    solution = model.getAttr('X', choices)
+    solution = sm.solution(x)
 
     schedout = open('schedule.csv', 'w')
     line = 'Slot'
@@ -155,7 +147,7 @@ if __name__ == "__main__":
             row = [''] * int(maxpanels[c])
             i = 0
             for n in names:
-                if solution[s, c, n] == 1:
+                if solution.get((s, c, n), 0) == 1:
                     row[i] = n + ' ' + str(int(prefsnew[n, c])) + '_' + str(int(crit[n]))
                     i = i + 1
 
@@ -177,7 +169,7 @@ if __name__ == "__main__":
         for n in names:
             row = ''
             for c in clubs:
-                if solution[s, c, n] == 1:
+                if solution.get((s, c, n), 0) == 1:
                     row = c + '_' + str(int(prefsnew[n, c]))
 
             line = line + ',' + row
@@ -186,5 +178,5 @@ if __name__ == "__main__":
 
     namesout.close()
 
-    print(model.status)
+    print(status)
     print(datetime.now().time())
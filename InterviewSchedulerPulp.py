@@ -1,7 +1,11 @@
-from pulp import *
 import sys
 from datetime import datetime
 
+import numpy as np
+from pulp import COINMP_DLL
+
+from ModelBuilder import build_model, pair_index, solve
+
 
 def read_input_csv(filename):
     row_header, matrix, col_header = list(), dict(), set()
@@ -63,42 +67,25 @@ if __name__ == "__main__":
 
     print('Creating IPLP')
 
-    prob = LpProblem("ClubSelections", LpMinimize)
-
-    choices = LpVariable.dicts("Choice", (slots, clubs, names), 0, 1, LpInteger)
+    # Only shortlisted (club, name) pairs in slots where the club has panels can be allocated
+    compnames = [(c, n) for n in names for c in clubs if shortlists[n, c] > 0]
+    pair_c, pair_n = pair_index(clubs, names, compnames)
+    panelsarr = np.array([[panels[s, c] for c in clubs] for s in slots])
     total = min(sum(shortlists.values()), sum(panels.values()))
 
     # Objective - allocate max students to the initial few slots
-    prob += lpSum(
-        [choices[s][c][n] * costs[s] * (1 - prefsnew.get((n, c), crit[n]) / (crit[n] + 1)) for s in slots for n in names
-         for c in
-         clubs]), "Sum_of_costs_all_students"
-
-    # Constraint all students to be allocated
-    prob += lpSum(
-        [choices[s][c][n] for s in slots for n in names for c in clubs]) == total, "Sum_of_all_students"
+    obj = np.array([[costs[s] * (1 - prefsnew[n, c] / (crit[n] + 1)) for s in slots] for c, n in compnames]).reshape(len(compnames), len(slots))
 
-    # Constraint - maximum number in a slot for a club is limited by panels
-    for c in clubs:
-        for s in slots:
-            prob += lpSum([choices[s][c][n] for n in names]) <= panels[s, c], "Sum_of_students_in_slot_%s_%s" % (c, s)
-
-    # Constraint - allocate student only if he has a shortlist
-    for n in names:
-        for c in clubs:
-            prob += lpSum([choices[s][c][n] for s in slots]) <= shortlists[n, c], "Sum_of_slots_for_student_%s_%s" % (
-                c, n)
-
-    # Constraint - slots should not conflict for a student
-    for s in slots:
-        for n in names:
-            prob += lpSum([choices[s][c][n] for c in clubs]) <= 1, "Sum_slots_per_student_all_clubs_%s_%s" % (s, n)
+    # Constraint all students to be allocated, slots limited by panels, only shortlisted students and no conflicting slots
+    sm = build_model(slots, clubs, names, panelsarr, pair_c, pair_n, total=total, obj=obj)
 
     print('Begin Solving')
 
-    prob.solve(COINMP_DLL())
+    x, status = solve(sm, 'pulp', pulp_solver=COINMP_DLL())
+
+    print("Status:", status)
 
-    print("Status:", LpStatus[prob.status])
+    allocated = list(sm.solution(x))
 
     schedout = open('schedule.csv', 'w')
     line = 'Slot'
@@ -108,17 +95,17 @@ if __name__ == "__main__":
             line = line + ',' + c + str(j + 1)
 
     schedout.write(line + '\n')
+    rows = dict(((s, c), [''] * int(maxpanels[c])) for s in slots for c in clubs)
+    filled = dict()
+    for s, c, n in allocated:
+        i = filled.get((s, c), 0)
+        rows[s, c][i] = n + ' ' + str(int(prefsnew[n, c])) + '_' + str(int(crit[n]))
+        filled[s, c] = i + 1
+
     for s in slots:
         line = s
         for c in clubs:
-            row = [''] * int(maxpanels[c])
-            i = 0
-            for n in names:
-                if choices[s][c][n].varValue == 1:
-                    row[i] = n + ' ' + str(int(prefsnew[n, c])) + '_' + str(int(crit[n]))
-                    i = i + 1
-
-            line = line + ',' + ','.join(row)
+            line = line + ',' + ','.join(rows[s, c])
 
         schedout.write(line + '\n')
 
@@ -131,15 +118,11 @@ if __name__ == "__main__":
         line = line + ',' + n
 
     namesout.write(line + '\n')
+    assigned = dict(((s, n), c + '_' + str(int(prefsnew[n, c]))) for s, c, n in allocated)
     for s in slots:
         line = s
         for n in names:
-            row = ''
-            for c in clubs:
-                if choices[s][c][n].varValue == 1:
-                    row = c + '_' + str(int(prefsnew[n, c]))
-
-            line = line + ',' + row
+            line = line + ',' + assigned.get((s, n), '')
 
         namesout.write(line + '\n')
 
@@ -1,7 +1,9 @@
 import sys
 from datetime import datetime
 
-from pyscipopt import Model, quicksum
+import numpy as np
+
+from ModelBuilder import build_model, pair_index, solve
 
 
 def read_input_csv(filename):
@@ -63,45 +65,23 @@ if __name__ == "__main__":
 
     print('Creating IPLP')
 
-    m = Model()
-    # m.setPresolve(SCIP_PARAMSETTING.OFF)
-
-    choices = {}
-    for s in slots:
-        for c in clubs:
-            for n in names:
-                name = str(s) + '_' + str(c) + '_' + str(n)
-                choices[s, c, n] = m.addVar(name, vtype='B')
-
+    # Only shortlisted (club, name) pairs in slots where the club has panels can be allocated
+    compnames = [(c, n) for n in names for c in clubs if shortlists[n, c] > 0]
+    pair_c, pair_n = pair_index(clubs, names, compnames)
+    panelsarr = np.array([[panels[s, c] for c in clubs] for s in slots])
     total = min(sum(shortlists.values()), sum(panels.values()))
 
     # Objective - allocate max students to the initial few slots
-    m.setObjective(
-        quicksum(
-            choices[s, c, n] * costs[s] * (1 - prefsnew.get((n, c), crit[n]) / (crit[n] + 1))
-            for s in slots for n in names for c in clubs), "minimize")
+    obj = np.array([[costs[s] * (1 - prefsnew[n, c] / (crit[n] + 1)) for s in slots] for c, n in compnames]).reshape(len(compnames), len(slots))
 
-    # Constraint all students to be allocated
-    m.addCons(quicksum(choices[s, c, n] for s in slots for n in names for c in clubs) == total)
-
-    # Constraint - maximum number in a slot for a club is limited by panels
-    for c in clubs:
-        for s in slots:
-            m.addCons(quicksum(choices[s, c, n] for n in names) <= panels[s, c])
-
-    # Constraint - allocate student only if he has a shortlist
-    for n in names:
-        for c in clubs:
-            m.addCons(quicksum(choices[s, c, n] for s in slots) <= shortlists[n, c])
-
-    # Constraint - slots should not conflict for a student
-    for s in slots:
-        for n in names:
-            m.addCons(quicksum(choices[s, c, n] for c in clubs) <= 1)
+    # Constraint all students to be allocated, slots limited by panels, only shortlisted students and no conflicting slots
+    sm = build_model(slots, clubs, names, panelsarr, pair_c, pair_n, total=total, obj=obj)
 
     print('Begin optimisation')
-    m.optimize()
-    print(m.getStatus())
+    x, status = solve(sm, 'scip')
+    print(status)
+
+    allocated = list(sm.solution(x))
 
     schedout = open('schedule.csv', 'w')
     line = 'Slot'
@@ -111,17 +91,17 @@ if __name__ == "__main__":
             line = line + ',' + c + str(j + 1)
 
     schedout.write(line + '\n')
+    rows = dict(((s, c), [''] * int(maxpanels[c])) for s in slots for c in clubs)
+    filled = dict()
+    for s, c, n in allocated:
+        i = filled.get((s, c), 0)
+        rows[s, c][i] = n + ' ' + str(int(prefsnew[n, c])) + '_' + str(int(crit[n]))
+        filled[s, c] = i + 1
+
     for s in slots:
         line = s
         for c in clubs:
-            row = [''] * int(maxpanels[c])
-            i = 0
-            for n in names:
-                if m.getVal(choices[s, c, n]) == 1:
-                    row[i] = n + ' ' + str(int(prefsnew[n, c])) + '_' + str(int(crit[n]))
-                    i = i + 1
-
-            line = line + ',' + ','.join(row)
+            line = line + ',' + ','.join(rows[s, c])
 
         schedout.write(line + '\n')
 
@@ -134,15 +114,11 @@ if __name__ == "__main__":
         line = line + ',' + n
 
     namesout.write(line + '\n')
+    assigned = dict(((s, n), c + '_' + str(int(prefsnew[n, c]))) for s, c, n in allocated)
     for s in slots:
         line = s
         for n in names:
-            row = ''
-            for c in clubs:
-                if m.getVal(choices[s, c, n]) == 1:
-                    row = c + '_' + str(int(prefsnew[n, c]))
-
-            line = line + ',' + row
+            line = line + ',' + assigned.get((s, n), '')
 
         namesout.write(line + '\n')
 
@@ -0,0 +1,601 @@
+"""
+    Solver-agnostic model builder shared by the interview schedulers.
+
+    The allocation model is turned into a sparse coefficient matrix (COO index arrays)
+    over one binary per (slot, shortlisted company-name pair), or per interview block and
+    pair, and handed to a backend in a single bulk call.
+"""
+import time
+
+import numpy as np
+
+SOLVERS = ('gurobi', 'highs', 'scip', 'pulp')
+
+
+class SparseModel(object):
+    def __init__(self, slots, companies, names, pair_c, pair_n):
+        self.slots = list(slots)
+        self.companies = list(companies)
+        self.names = list(names)
+        self.pair_c = np.asarray(pair_c, dtype=np.int64)
+        self.pair_n = np.asarray(pair_n, dtype=np.int64)
+        self.var_s = np.zeros(0, dtype=np.int64)
+        self.var_p = np.zeros(0, dtype=np.int64)
+        self.var_len = np.zeros(0, dtype=np.int64)
+        self.obj = np.zeros(0)
+        self.lb = np.zeros(0)
+        self.ub = np.zeros(0)
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.cols = np.zeros(0, dtype=np.int64)
+        self.vals = np.zeros(0)
+        self.sense = np.zeros(0, dtype='U1')
+        self.rhs = np.zeros(0)
+        self.families = []
+        # (phase, seconds) of the model build and solve
+        self.timings = []
+        # Variables and rows removed by the preprocessing of build_model
+        self.removed = dict(variables=0, rows=0)
+        # Objective of the solution and best bound of the last solve
+        self.objective = np.nan
+        self.bound = np.nan
+
+    def lap(self, phase, since):
+        """Record the phase as taking the time since the perf_counter value since and return the current perf_counter"""
+        now = time.perf_counter()
+        self.timings.append((phase, now - since))
+        return now
+
+    @property
+    def var_c(self):
+        return self.pair_c[self.var_p]
+
+    @property
+    def var_n(self):
+        return self.pair_n[self.var_p]
+
+    @property
+    def num_vars(self):
+        return len(self.var_s)
+
+    @property
+    def num_rows(self):
+        return len(self.rhs)
+
+    @property
+    def nnz(self):
+        return len(self.vals)
+
+    @property
+    def gap(self):
+        """Relative gap between the objective and the bound of the last solve"""
+        return abs(self.objective - self.bound) / max(abs(self.objective), 1e-10)
+
+    def add_rows(self, family, rows, cols, vals, sense, rhs):
+        """Append a constraint family given its local row ids, columns, coefficients, senses and rhs"""
+        offset = self.num_rows
+        self.rows = np.concatenate([self.rows, np.asarray(rows, dtype=np.int64) + offset])
+        self.cols = np.concatenate([self.cols, np.asarray(cols, dtype=np.int64)])
+        self.vals = np.concatenate([self.vals, np.asarray(vals, dtype=float)])
+        self.rhs = np.concatenate([self.rhs, np.asarray(rhs, dtype=float)])
+        self.sense = np.concatenate([self.sense, np.broadcast_to(np.asarray(sense, dtype='U1'), (len(rhs),))])
+        self.families.append((family, offset, self.num_rows))
+
+    def csr(self):
+        from scipy.sparse import csr_matrix
+        return csr_matrix((self.vals, (self.rows, self.cols)), shape=(self.num_rows, self.num_vars))
+
+    def cover(self):
+        """Variable and slot index of every slot covered by a variable, each variable covers var_len slots from var_s"""
+        v = np.repeat(np.arange(self.num_vars), self.var_len)
+        return v, self.var_s[v] + np.arange(len(v)) - np.repeat(np.cumsum(self.var_len) - self.var_len, self.var_len)
+
+    def varid(self):
+        """Dense (slot, pair) -> index of the variable covering it, -1 where no variable exists"""
+        ids = np.full((len(self.slots), len(self.pair_c)), -1, dtype=np.int64)
+        v, s = self.cover()
+        ids[s, self.var_p[v]] = v
+        return ids
+
+    def keys(self):
+        return [(self.slots[s], self.companies[c], self.names[n]) for s, c, n in zip(self.var_s, self.var_c, self.var_n)]
+
+    def vector(self, assignments):
+        """0/1 vector over the variables covering the (slot, company, name) assignments that exist in the model"""
+        sidx = dict((s, i) for i, s in enumerate(self.slots))
+        pid = dict(((self.companies[c], self.names[n]), i) for i, (c, n) in enumerate(zip(self.pair_c, self.pair_n)))
+        ids = self.varid()
+        sel = np.array([ids[sidx[s], pid[c, n]] for s, c, n in assignments if s in sidx and (c, n) in pid], dtype=np.int64)
+        x = np.zeros(self.num_vars)
+        x[sel[sel >= 0]] = 1
+        return x
+
+    def allocated(self, x):
+        """(slot, pair) index arrays of the slots covered by the variables set in the solution vector x"""
+        v, s = self.cover()
+        x = np.asarray(x)
+        if len(x) != self.num_vars:
+            # No solution, e.g. the time limit was hit before the first one
+            x = np.zeros(self.num_vars)
+        sel = x[v] > 0.5
+        return s[sel], self.var_p[v[sel]]
+
+    def feasible(self, x, tol=1e-6):
+        """Whether the solution vector x is within the bounds and satisfies every row"""
+        x = np.asarray(x, dtype=float)
+        lhs = np.bincount(self.rows, weights=self.vals * x[self.cols], minlength=self.num_rows)
+        ok = np.where(self.sense == '<', lhs <= self.rhs + tol, np.where(self.sense == '>', lhs >= self.rhs - tol, np.abs(lhs - self.rhs) <= tol))
+        return bool(ok.all() and (x >= self.lb - tol).all() and (x <= self.ub + tol).all())
+
+    def solution(self, x):
+        """Dict of (slot, company, name) -> 1 for every slot covered by a variable set in the solution vector x"""
+        s, p = self.allocated(x)
+        return dict(((self.slots[i], self.companies[c], self.names[n]), 1) for i, c, n in zip(s, self.pair_c[p], self.pair_n[p]))
+
+
+def pair_index(companies, names, compnames):
+    cidx = dict((c, i) for i, c in enumerate(companies))
+    nidx = dict((n, i) for i, n in enumerate(names))
+    pair_c = np.array([cidx[c] for c, n in compnames], dtype=np.int64)
+    pair_n = np.array([nidx[n] for c, n in compnames], dtype=np.int64)
+    return pair_c, pair_n
+
+
+def pair_ranks(pair_c, pair_n, pref):
+    """Rank of each pair among the shortlists of its name ordered by preference, ties broken by company order"""
+    order = np.lexsort((pair_c, pref, pair_n))
+    sorted_n = pair_n[order]
+    starts = np.flatnonzero(np.r_[True, sorted_n[1:] != sorted_n[:-1]])
+    pos = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = pos + 1
+    return rank
+
+
+def objective_coefficients(rank, crit, over, nslots):
+    """
+    (pairs x slots) objective with the slot cost scaled by preference rank. Pairs of companies with more shortlists
+    than panels (over) push preferred interviews early, the rest spread interviews by preference.
+    """
+    costs = np.arange(1, nslots + 1, dtype=float)
+    scaled = (np.asarray(rank, dtype=float) / (np.asarray(crit, dtype=float) + 1))[:, None]
+    return np.where(np.asarray(over)[:, None], scaled * (nslots + 1 - costs), (1 - scaled) * costs)
+
+
+def _sum_rows(keys, nkeys):
+    # One row per distinct key in key order, returns local row id of each entry and the index of the first entry of each row.
+    # Keys are below nkeys, so rows are numbered through a dense table in linear time unless it would be much larger than keys
+    if nkeys > 8 * len(keys) + 1024:
+        uniq, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        return inverse.ravel(), first
+    used = np.zeros(nkeys, dtype=bool)
+    used[keys] = True
+    rows = (np.cumsum(used) - 1)[keys]
+    first = np.full(int(used.sum()), len(keys), dtype=np.int64)
+    np.minimum.at(first, rows, np.arange(len(keys)))
+    return rows, first
+
+
+def _binding_rows(rows, cols, vals, rhs, ub):
+    # Keep the '<' rows of nonnegative coefficients that can be violated, dropped rows hold whatever the variables take
+    rhs = np.asarray(rhs, dtype=float)
+    keep = np.bincount(rows, weights=vals * ub[cols], minlength=len(rhs)) > rhs
+    sel = keep[rows]
+    return (np.cumsum(keep) - 1)[rows[sel]], cols[sel], vals[sel], rhs[keep], int((~keep).sum())
+
+
+def _block_ids(varid, c, si, bs, pair_c):
+    # Blocks x slots in block x pairs of the variables of company c in its aligned interview blocks, -1 where missing
+    ends = np.arange(si - 1 + bs, varid.shape[0], si)
+    pairs = np.flatnonzero(pair_c == c)
+    return varid[(ends[:, None] - np.arange(si - 1, -1, -1))[:, :, None], pairs[None, None, :]]
+
+
+def first_panel_slots(panels):
+    """Index of the first slot with panels per company, the number of slots for companies without any"""
+    haspanels = np.asarray(panels) > 0
+    return np.where(haspanels.any(axis=0), haspanels.argmax(axis=0), len(haspanels))
+
+
+def freeze_slots(panels, pair_c, slots_int, past, first):
+    """
+    Reduce the model to the slots from index first onwards given the past allocations as (slot, pair) indices.
+
+    Returns the mask of pairs still to be scheduled, the per company block start and number of slots to allocate in
+    the remaining horizon, and the (slot, pair) allocations fixed to 1 and 0 in it, indexed over the kept pairs.
+    Interviews cut by the first slot keep their remaining slots and the rest of a cut block stays empty.
+    """
+    panels = np.asarray(panels)
+    sint = np.asarray(slots_int, dtype=np.int64)
+    past = np.asarray(past, dtype=np.int64).reshape(-1, 2)
+    nslots, npairs = panels.shape[0] - first, len(pair_c)
+    si_p = sint[pair_c]
+    done = np.bincount(past[:, 1], minlength=npairs)
+    last = np.full(npairs, -1, dtype=np.int64)
+    np.maximum.at(last, past[:, 1], past[:, 0])
+    remaining = si_p - done
+    keep = remaining > 0
+    newidx = np.cumsum(keep) - 1
+    partial = np.flatnonzero(keep & (done > 0))
+
+    bs = first_panel_slots(panels)
+    block_start = np.where(bs >= first, bs - first, (bs - first) % sint)
+
+    fixed, forbid = [], []
+    for p in partial:
+        cont = set(range(last[p] + 1 - first, last[p] + 1 - first + remaining[p]))
+        fixed += [(s, newidx[p]) for s in cont if 0 <= s < nslots]
+        forbid += [(s, newidx[p]) for s in range(nslots) if s not in cont]
+    # The rest of a block cut by the first slot only hosts the interviews continuing into it
+    partialset = set(partial.tolist())
+    for c in np.flatnonzero((bs < first) & (block_start > 0)):
+        forbid += [(s, newidx[p]) for p in np.flatnonzero(keep & (pair_c == c)) if p not in partialset for s in range(block_start[c])]
+
+    ncomps = panels.shape[1]
+    need = np.bincount(pair_c[keep], weights=remaining[keep], minlength=ncomps)
+    cont = np.bincount(pair_c[partial], weights=remaining[partial], minlength=ncomps)
+    free = np.array([panels[first + block_start[c]:, c].sum() for c in range(ncomps)])
+    demand = np.minimum(need, free // sint * sint + cont).astype(np.int64)
+    return keep, block_start, demand, fixed, forbid
+
+
+def block_capacity(panels, slots_int, block_start=None):
+    """Interviews per company that fit in its aligned blocks, each block holds as many as the fewest panels in its slots"""
+    panels = np.asarray(panels)
+    if block_start is None:
+        block_start = first_panel_slots(panels)
+    nslots, ncomps = panels.shape
+    cap = np.zeros(ncomps, dtype=np.int64)
+    for c in range(ncomps):
+        si = slots_int[c]
+        starts = np.arange(block_start[c], nslots - si + 1, si)
+        cap[c] = np.min([panels[starts + k, c] for k in range(si)], axis=0, initial=np.iinfo(np.int64).max).sum()
+    return cap
+
+
+def block_panels(panels, slots_int, block_start=None):
+    """Panels per slot usable by whole interviews, each slot of an aligned block gets the fewest panels of the block"""
+    usable = np.array(panels)
+    if block_start is None:
+        block_start = first_panel_slots(usable)
+    for c in np.flatnonzero(np.asarray(slots_int) > 1):
+        si = slots_int[c]
+        starts = np.arange(block_start[c], len(usable) - si + 1, si)
+        least = np.min([usable[starts + k, c] for k in range(si)], axis=0, initial=np.iinfo(np.int64).max)
+        for k in range(si):
+            usable[starts + k, c] = least
+    return usable
+
+
+def block_variables(panels, pair_c, sint, block_start):
+    """
+    Start slot, pair and length of every interview block variable. Blocks are aligned to block_start per company and need
+    panels in all their slots, a shorter head block before block_start hosts interviews continuing from a frozen slot.
+    """
+    nslots, ncomps = panels.shape
+    var_s, var_p, var_len = [], [], []
+    for c in range(ncomps):
+        si, bs = sint[c], block_start[c]
+        starts = np.arange(bs, nslots - si + 1, si)
+        ok = np.ones(len(starts), dtype=bool)
+        for k in range(si):
+            ok &= panels[starts + k, c] > 0
+        starts, lens = starts[ok], np.full(ok.sum(), si)
+        if 0 < bs < si and (panels[:bs, c] > 0).all():
+            starts, lens = np.r_[0, starts], np.r_[bs, lens]
+        pairs = np.flatnonzero(pair_c == c)
+        var_s.append(np.repeat(starts, len(pairs)))
+        var_p.append(np.tile(pairs, len(starts)))
+        var_len.append(np.repeat(lens, len(pairs)))
+    var_s, var_p, var_len = [np.concatenate(a).astype(np.int64) for a in (var_s, var_p, var_len)]
+    order = np.lexsort((var_p, var_s))
+    return var_s[order], var_p[order], var_len[order]
+
+
+def build_model(slots, companies, names, panels, pair_c, pair_n, slots_int=None, groups=None, demand=None, total=None,
+                obj=None, fixed=(), forbid=(), block_start=None, demand_sense='=', blocks=False):
+    """
+    Build the allocation model over shortlisted pairs.
+
+    panels is a (slots x companies) array, pair_c/pair_n index the shortlisted (company, name) pairs, slots_int
+    and block_start are per company, groups maps each company to the group whose shortlist and demand rows it
+    shares (GD panels), demand is the required (or with demand_sense '<' the maximum) number of allocated slots per
+    group and total a single overall allocation. obj is a (pairs x slots) cost array defaulting to the slot cost, fixed and forbid are
+    (slot, pair) index tuples forced to 1 and 0. With blocks every variable is a whole interview block instead of one slot, which
+    removes the contiguity equalities.
+
+    Variables that can never be 1 (forbidden, in an interview block missing a slot or of a group without demand) are removed
+    before any row is built and rows that can never be violated are left out, sm.removed counts both.
+    """
+    clock = time.perf_counter()
+    panels = np.asarray(panels)
+    sm = SparseModel(slots, companies, names, pair_c, pair_n)
+    nslots, ncomps, nnames = len(sm.slots), len(sm.companies), len(sm.names)
+    sint = np.ones(ncomps, dtype=np.int64) if slots_int is None else np.asarray(slots_int, dtype=np.int64)
+    groups = np.arange(ncomps) if groups is None else np.asarray(groups, dtype=np.int64)
+
+    if block_start is None:
+        block_start = first_panel_slots(panels)
+
+    # Variables - only where the company of the pair has panels in the slot, or in every slot of the block
+    if blocks:
+        sm.var_s, sm.var_p, sm.var_len = block_variables(panels, sm.pair_c, sint, block_start)
+    else:
+        sm.var_s, sm.var_p = np.nonzero(panels[:, sm.pair_c] > 0)
+        sm.var_len = np.ones(sm.num_vars, dtype=np.int64)
+    clock = sm.lap('variables', clock)
+
+    # Preprocessing - remove the variables that can never be 1 instead of bounding them to 0
+    varid = sm.varid()
+    dead = np.zeros(sm.num_vars, dtype=bool)
+    forbid = varid[tuple(np.asarray(forbid, dtype=np.int64).reshape(-1, 2).T)]
+    dead[forbid[forbid >= 0]] = True
+    if demand is not None and demand_sense != '>':
+        dead |= (np.asarray(demand) <= 0)[groups[sm.var_c]]
+    # A block missing any of its slots cannot host the interview at all
+    for c in ([] if blocks else np.flatnonzero(sint > 1)):
+        ids = _block_ids(varid, c, sint[c], block_start[c], sm.pair_c)
+        broken = ((ids < 0) | dead[ids]).any(axis=1)
+        dead[ids[(ids >= 0) & broken[:, None, :]]] = True
+    # Fixed variables stay, bounded to 0 they keep the model infeasible
+    fixed = varid[tuple(np.asarray(fixed, dtype=np.int64).reshape(-1, 2).T)]
+    fixed = fixed[fixed >= 0]
+    zero = np.zeros(sm.num_vars, dtype=bool)
+    zero[fixed] = dead[fixed]
+    dead[fixed] = False
+    alive = np.cumsum(~dead) - 1
+    fixed, zero = alive[fixed], zero[~dead]
+    sm.var_s, sm.var_p, sm.var_len = sm.var_s[~dead], sm.var_p[~dead], sm.var_len[~dead]
+    sm.removed['variables'] = int(dead.sum())
+    var_c, var_n, span = sm.var_c, sm.var_n, sm.var_len.astype(float)
+    cov_v, cov_s = sm.cover()
+    cov_c, cov_n = var_c[cov_v], var_n[cov_v]
+    clock = sm.lap('preprocessing', clock)
+    if obj is None:
+        sm.obj = np.bincount(cov_v, weights=cov_s + 1.0, minlength=sm.num_vars)
+    else:
+        sm.obj = np.bincount(cov_v, weights=np.asarray(obj, dtype=float)[sm.var_p[cov_v], cov_s], minlength=sm.num_vars)
+    sm.lb = np.zeros(sm.num_vars)
+    sm.ub = np.ones(sm.num_vars)
+    sm.lb[fixed] = 1
+    sm.ub[zero] = 0
+    clock = sm.lap('objective', clock)
+    varid = sm.varid()
+    allvars = np.arange(sm.num_vars)
+
+    # Constraint - maximum number in a slot for a company is limited by panels
+    rows, first = _sum_rows(cov_s * ncomps + cov_c, nslots * ncomps)
+    rows, cols, vals, rhs, dropped = _binding_rows(rows, cov_v, np.ones(len(cov_v)), panels[cov_s[first], cov_c[first]], sm.ub)
+    sm.add_rows('panels', rows, cols, vals, '<', rhs)
+    sm.removed['rows'] += dropped
+    clock = sm.lap('panels', clock)
+
+    # Constraint - allocate student only if he has a shortlist
+    rows, first = _sum_rows(groups[var_c] * nnames + var_n, (groups.max(initial=0) + 1) * nnames)
+    rows, cols, vals, rhs, dropped = _binding_rows(rows, allvars, span, sint[var_c[first]], sm.ub)
+    sm.add_rows('shortlist', rows, cols, vals, '<', rhs)
+    sm.removed['rows'] += dropped
+    clock = sm.lap('shortlist', clock)
+
+    # Constraint - slots should not conflict for a student
+    rows, first = _sum_rows(cov_s * nnames + cov_n, nslots * nnames)
+    rows, cols, vals, rhs, dropped = _binding_rows(rows, cov_v, np.ones(len(cov_v)), np.ones(len(first)), sm.ub)
+    sm.add_rows('conflict', rows, cols, vals, '<', rhs)
+    sm.removed['rows'] += dropped
+    clock = sm.lap('conflict', clock)
+
+    # Constraint - allocate all students or number of interviews possible
+    if demand is not None:
+        sm.add_rows('demand', groups[var_c], allvars, span, demand_sense, demand)
+    if total is not None:
+        sm.add_rows('total', np.zeros(sm.num_vars), allvars, span, '=', [total])
+    clock = sm.lap('demand', clock)
+
+    # Constraint - for multiple slots per interview, same candidate should be allocated (block variables need none)
+    eqrows, eqcols, eqvals = [], [], []
+    for c in ([] if blocks else np.flatnonzero(sint > 1)):
+        ids = _block_ids(varid, c, sint[c], block_start[c], sm.pair_c)
+        if not ids.size:
+            continue
+        # Only blocks with a fixed variable can still miss slots
+        broken = (ids < 0).any(axis=1)
+        sm.ub[ids[(ids >= 0) & broken[:, None, :]]] = 0
+        last, prev = ids[:, -1:, :], ids[:, :-1, :]
+        keep = np.broadcast_to(~broken[:, None, :], prev.shape)
+        last, prev = np.broadcast_to(last, prev.shape)[keep], prev[keep]
+        eqcols.append(np.concatenate([last, prev]))
+        eqvals.append(np.concatenate([np.ones(len(last)), -np.ones(len(prev))]))
+        eqrows.append(np.tile(np.arange(len(last)), 2) + sum(len(r) // 2 for r in eqrows))
+    if eqrows:
+        rows = np.concatenate(eqrows)
+        sm.add_rows('contiguity', rows, np.concatenate(eqcols), np.concatenate(eqvals), '=', np.zeros(len(rows) // 2))
+
+    sm.lap('contiguity', clock)
+
+    return sm
+
+
+def gurobi_model(sm, name='interviews', relax=False):
+    from gurobipy import GRB, Model
+    model = Model(name)
+    x = model.addMVar(sm.num_vars, lb=sm.lb, ub=sm.ub, obj=sm.obj, vtype=GRB.CONTINUOUS if relax else GRB.BINARY, name='G')
+    model.addMConstr(sm.csr(), x, sm.sense, sm.rhs)
+    model.ModelSense = GRB.MINIMIZE
+    return model, x
+
+
+def highs_model(sm, relax=False):
+    import highspy
+    h = highspy.Highs()
+    inf = highspy.kHighsInf
+    h.addVars(sm.num_vars, sm.lb, sm.ub)
+    idx = np.arange(sm.num_vars, dtype=np.int32)
+    h.changeColsCost(sm.num_vars, idx, sm.obj)
+    if not relax:
+        h.changeColsIntegrality(sm.num_vars, idx, np.full(sm.num_vars, highspy.HighsVarType.kInteger))
+    lower = np.where(sm.sense == '<', -inf, sm.rhs)
+    upper = np.where(sm.sense == '>', inf, sm.rhs)
+    a = sm.csr()
+    h.addRows(sm.num_rows, lower, upper, a.nnz, a.indptr[:-1].astype(np.int32), a.indices.astype(np.int32), a.data)
+    return h
+
+
+def scip_model(sm, relax=False):
+    from pyscipopt import Model, quicksum
+    m = Model()
+    x = [m.addVar('G%d' % i, vtype='C' if relax else 'B', lb=lb, ub=ub, obj=obj) for i, (lb, ub, obj) in enumerate(zip(sm.lb, sm.ub, sm.obj))]
+    m.setMinimize()
+    a = sm.csr()
+    for r in range(sm.num_rows):
+        lo, hi = a.indptr[r], a.indptr[r + 1]
+        expr = quicksum(v * x[j] for j, v in zip(a.indices[lo:hi], a.data[lo:hi]))
+        if sm.sense[r] == '<':
+            m.addCons(expr <= sm.rhs[r])
+        elif sm.sense[r] == '>':
+            m.addCons(expr >= sm.rhs[r])
+        else:
+            m.addCons(expr == sm.rhs[r])
+    return m, x
+
+
+def pulp_model(sm, name='interviews', relax=False):
+    from pulp import LpAffineExpression, LpConstraint, LpContinuous, LpInteger, LpMinimize, LpProblem, LpVariable
+    prob = LpProblem(name, LpMinimize)
+    x = [LpVariable('G%d' % i, lb, ub, LpContinuous if relax else LpInteger) for i, (lb, ub) in enumerate(zip(sm.lb, sm.ub))]
+    prob += LpAffineExpression(zip(x, sm.obj))
+    senses = {'<': -1, '=': 0, '>': 1}
+    a = sm.csr()
+    for r in range(sm.num_rows):
+        lo, hi = a.indptr[r], a.indptr[r + 1]
+        expr = LpAffineExpression(zip([x[j] for j in a.indices[lo:hi]], a.data[lo:hi]))
+        prob.addConstraint(LpConstraint(expr, senses[sm.sense[r]], 'R%d' % r, sm.rhs[r]))
+    return prob, x
+
+
+def solve(sm, solver='gurobi', pulp_solver=None, start=None, relax=False, threads=None, time_limit=None, mip_gap=None, on_incumbent=None,
+          complete_start=False):
+    """
+    Solve the model with the given backend and return the solution vector and the backend status. start is an
+    optional 0/1 vector over the variables; its ones are passed as a partial MIP start that the solver completes, or with
+    complete_start its zeros as well, so a start that is already a feasible schedule is taken as it is.
+    relax solves the LP relaxation instead and threads caps the solver threads. time_limit in seconds and the relative
+    mip_gap stop the solve early with the best solution found, which is empty when there is none. Its objective and the
+    best bound are set on sm. on_incumbent is called with the solution vector and objective of every improving solution
+    found during the solve, PuLP has no callback for it. The backend model build and the solver run, presolve included,
+    are added to sm.timings.
+    """
+    clock = time.perf_counter()
+    ones = np.flatnonzero(np.asarray(start) > 0.5) if start is not None else None
+    if complete_start:
+        ones = np.arange(sm.num_vars)
+    sm.objective, sm.bound = np.nan, np.nan
+    x0 = np.zeros(0)
+    if solver == 'gurobi':
+        from gurobipy import GRB, GurobiError
+        model, x = gurobi_model(sm, relax=relax)
+        clock = sm.lap('backend', clock)
+        if threads:
+            model.Params.Threads = threads
+        if time_limit:
+            model.Params.TimeLimit = time_limit
+        if mip_gap is not None:
+            model.Params.MIPGap = mip_gap
+        if start is not None:
+            x.Start = np.where(np.asarray(start) > 0.5, 1.0, 0.0 if complete_start else GRB.UNDEFINED)
+        callback = None
+        if on_incumbent is not None:
+            def callback(cbmodel, where):
+                if where == GRB.Callback.MIPSOL:
+                    on_incumbent(cbmodel.cbGetSolution(x), cbmodel.cbGet(GRB.Callback.MIPSOL_OBJ))
+        model.optimize(callback)
+        sm.lap('solver', clock)
+        if model.SolCount:
+            sm.objective, x0 = model.ObjVal, np.asarray(x.X)
+        try:
+            sm.bound = model.ObjBound if model.IsMIP else model.ObjVal
+        except GurobiError:
+            pass
+        return x0, model.status
+    if solver == 'highs':
+        import highspy
+        h = highs_model(sm, relax=relax)
+        clock = sm.lap('backend', clock)
+        if threads:
+            h.setOptionValue('threads', threads)
+        if time_limit:
+            h.setOptionValue('time_limit', float(time_limit))
+        if mip_gap is not None:
+            h.setOptionValue('mip_rel_gap', float(mip_gap))
+        if start is not None:
+            h.setSolution(len(ones), ones.astype(np.int32), np.round(np.asarray(start, dtype=float)[ones]))
+        if on_incumbent is not None:
+            h.cbMipImprovingSolution.subscribe(lambda e: on_incumbent(e.data_out.mip_solution, e.data_out.objective_function_value))
+        h.run()
+        sm.lap('solver', clock)
+        info = h.getInfo()
+        if int(info.primal_solution_status) == int(highspy.SolutionStatus.kSolutionStatusFeasible):
+            sm.objective, x0 = info.objective_function_value, np.asarray(h.getSolution().col_value)
+            sm.bound = sm.objective if relax else info.mip_dual_bound
+        return x0, h.modelStatusToString(h.getModelStatus())
+    if solver == 'scip':
+        m, x = scip_model(sm, relax=relax)
+        clock = sm.lap('backend', clock)
+        if threads:
+            m.setParam('parallel/maxnthreads', threads)
+        if time_limit:
+            m.setParam('limits/time', time_limit)
+        if mip_gap is not None:
+            m.setParam('limits/gap', mip_gap)
+        if start is not None:
+            sol = m.createSol() if complete_start else m.createPartialSol()
+            for i in np.flatnonzero(np.asarray(start) > 0.5):
+                m.setSolVal(sol, x[i], 1)
+            m.addSol(sol)
+        if on_incumbent is not None:
+            from pyscipopt import SCIP_EVENTTYPE, Eventhdlr
+
+            class Incumbent(Eventhdlr):
+                def eventinit(self):
+                    self.model.catchEvent(SCIP_EVENTTYPE.BESTSOLFOUND, self)
+
+                def eventexit(self):
+                    self.model.dropEvent(SCIP_EVENTTYPE.BESTSOLFOUND, self)
+
+                def eventexec(self, event):
+                    best = self.model.getBestSol()
+                    on_incumbent([self.model.getSolVal(best, v) for v in x], self.model.getSolObjVal(best))
+
+            m.includeEventhdlr(Incumbent(), 'incumbent', 'Passes improving solutions on')
+        m.optimize()
+        sm.lap('solver', clock)
+        if m.getNSols():
+            sm.objective, x0 = m.getObjVal(), np.array([m.getVal(v) for v in x])
+        sm.bound = m.getDualbound()
+        return x0, m.getStatus()
+    if solver == 'pulp':
+        from pulp import LpSolution, LpSolutionIntegerFeasible, LpSolutionOptimal, LpStatus, value
+        prob, x = pulp_model(sm, relax=relax)
+        clock = sm.lap('backend', clock)
+        if pulp_solver is None:
+            from pulp import PULP_CBC_CMD
+            pulp_solver = PULP_CBC_CMD()
+        if threads:
+            pulp_solver.optionsDict['threads'] = threads
+        if time_limit:
+            pulp_solver.timeLimit = time_limit
+        if mip_gap is not None:
+            pulp_solver.optionsDict['gapRel'] = mip_gap
+        if start is not None:
+            for i in ones:
+                x[i].setInitialValue(round(float(start[i])))
+            pulp_solver.optionsDict['warmStart'] = True
+        prob.solve(pulp_solver)
+        sm.lap('solver', clock)
+        # PuLP does not pass on the bound of the solver and reports a solve stopped by a limit as optimal
+        if prob.sol_status in (LpSolutionOptimal, LpSolutionIntegerFeasible):
+            sm.objective, x0 = value(prob.objective), np.array([v.varValue or 0 for v in x])
+            if prob.sol_status == LpSolutionOptimal:
+                sm.bound = sm.objective
+            else:
+                return x0, LpSolution[prob.sol_status]
+        return x0, LpStatus[prob.status]
+    raise ValueError('Unknown solver ' + str(solver) + '. It should be one of ' + ', '.join(SOLVERS))
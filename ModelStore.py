@@ -0,0 +1,215 @@
+"""
+    Stored copies of built allocation models for offline debugging and solver only runs.
+
+    A model is written as gzipped free MPS with columns x0, x1, ... and rows r0, r1, ... in model order,
+    next to an .npz mapping every column to its (slot, company, name) labels. Both are named after a
+    hash of the normalised model inputs, so a rerun on the same inputs finds the stored model. Run as a
+    script it solves a stored model with any backend and writes sche.csv and names.csv.
+
+    A state file is a single .npz with the model arrays, the schedule and the inputs needed to change
+    it later, so a candidate leaving is handled without parsing or building again.
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from ModelBuilder import SOLVERS, SparseModel, solve
+from OutputWriter import names_frame, schedule_frame, write_atomic
+
+VERSION = 1
+SENSES = {'<': 'L', '=': 'E', '>': 'G'}
+# Column types of the parsed MPS sections, names and values alternate from the second column on
+MPS_COLUMNS = dict(ROWS={0: str, 1: str}, COLUMNS={0: str, 1: str, 2: float, 3: str, 4: float}, RHS={0: str, 1: str, 2: float, 3: str, 4: float},
+                   BOUNDS={0: str, 1: str, 2: str, 3: float})
+MODEL_ARRAYS = ('var_s', 'var_p', 'var_len', 'obj', 'lb', 'ub', 'rows', 'cols', 'vals', 'sense', 'rhs')
+
+
+def model_key(**inputs):
+    """Hash of the model inputs, arrays by dtype, shape and content, lists of labels or index tuples as arrays"""
+    h = hashlib.sha1(str(VERSION).encode())
+    for k in sorted(inputs):
+        h.update(b'\0' + k.encode() + b'\0')
+        if inputs[k] is None:
+            continue
+        v = np.ascontiguousarray(inputs[k])
+        if v.dtype == object:
+            v = v.astype(str)
+        h.update((v.dtype.str + str(v.shape)).encode())
+        h.update(v.tobytes())
+    return h.hexdigest()[:16]
+
+
+def model_path(out, key):
+    """Base name of the stored model files, .mps.gz and .npz are appended"""
+    return out + '\\model_' + key
+
+
+def write_mps(sm, filename):
+    """Gzipped free MPS of the model, every column gets an objective entry so the columns are listed in model order"""
+    a = sm.csr().tocsc()
+    ncols = sm.num_vars
+    # Objective entry of each column first, then its rows
+    ent_col = np.r_[np.arange(ncols), np.repeat(np.arange(ncols), np.diff(a.indptr))]
+    ent_row = np.r_[np.full(ncols, -1), a.indices]
+    ent_val = np.r_[sm.obj, a.data]
+    order = np.argsort(ent_col, kind='stable')
+    rowname = ['OBJ' if r < 0 else 'r%d' % r for r in ent_row[order]]
+    # The fastest gzip level, the higher levels take seconds on large models for a few percent smaller files
+    with gzip.open(filename, 'wt', compresslevel=1) as f:
+        f.write('NAME interviews\nROWS\n N OBJ\n')
+        f.writelines(' %s r%d\n' % (SENSES[s], r) for r, s in enumerate(sm.sense))
+        f.write("COLUMNS\n MARKER 'MARKER' 'INTORG'\n")
+        f.writelines(' x%d %s %r\n' % (c, r, float(v)) for c, r, v in zip(ent_col[order], rowname, ent_val[order]))
+        f.write(" MARKER 'MARKER' 'INTEND'\nRHS\n")
+        f.writelines(' RHS r%d %r\n' % (r, float(sm.rhs[r])) for r in np.flatnonzero(sm.rhs))
+        f.write('BOUNDS\n')
+        f.writelines(' UP BND x%d %r\n' % (c, float(v)) for c, v in enumerate(sm.ub))
+        f.writelines(' LO BND x%d %r\n' % (c, float(sm.lb[c])) for c in np.flatnonzero(sm.lb))
+        f.write('ENDATA\n')
+
+
+def mps_entries(frame, index, filename):
+    """Lines, positions in index and values of the (name, value) pairs of a COLUMNS or RHS section, one or two per line"""
+    line = np.r_[np.arange(len(frame)), np.arange(len(frame))]
+    names, vals = np.r_[frame[1].to_numpy(), frame[3].to_numpy()], np.r_[frame[2].to_numpy(), frame[4].to_numpy()]
+    keep = pd.notna(names)
+    pos = index.get_indexer(names[keep])
+    if (pos < 0).any():
+        raise ValueError(filename + ' has entries for unknown rows, ' + str(names[keep][pos < 0][0]))
+    return line[keep], pos, vals[keep]
+
+
+def read_mps(filename, sm):
+    """Set the objective, bounds and rows of sm from a free MPS file as written by write_mps, plain or gzipped"""
+    opener = gzip.open if filename.endswith('.gz') else open
+    with opener(filename, 'rt') as f:
+        text = f.read()
+    # Every section is parsed at once by the C reader of pandas, with up to two (row, value) pairs per line
+    heads = list(re.finditer(r'^(\S+).*$', text, flags=re.M))
+    sections = dict()
+    for head, end in zip(heads, heads[1:] + [None]):
+        section = head.group(1)
+        if section == 'ENDATA':
+            break
+        if section not in ('NAME', 'ROWS', 'COLUMNS', 'RHS', 'BOUNDS'):
+            raise ValueError(filename + ' has an unsupported ' + section + ' section')
+        body = re.sub(r"^.*'MARKER'.*$", '', text[head.end():None if end is None else end.start()], flags=re.M)
+        if section in MPS_COLUMNS and body.strip():
+            sections[section] = pd.read_csv(io.StringIO(body), sep=r'\s+', header=None, names=range(5), dtype=MPS_COLUMNS[section],
+                                            comment='*', float_precision='round_trip')
+
+    rows = sections['ROWS']
+    objname = rows[1][rows[0] == 'N'].iloc[0]
+    rows = rows[rows[0] != 'N']
+    rowid = pd.Index(list(rows[1]) + [objname])
+
+    columns = sections['COLUMNS']
+    colid, colnames = pd.factorize(columns[0])
+    if len(colnames) != sm.num_vars:
+        raise ValueError(filename + ' has ' + str(len(colnames)) + ' columns but its mapping ' + str(sm.num_vars))
+    line, pos, val = mps_entries(columns, rowid, filename)
+    isobj = pos == len(rows)
+    sm.obj = np.zeros(sm.num_vars)
+    sm.obj[colid[line[isobj]]] = val[isobj]
+    sm.rows, sm.cols, sm.vals = pos[~isobj].astype(np.int64), colid[line[~isobj]].astype(np.int64), val[~isobj]
+    sm.sense = rows[0].map({'L': '<', 'E': '=', 'G': '>'}).to_numpy(dtype='U1')
+    sm.rhs = np.zeros(len(rows))
+    if 'RHS' in sections:
+        line, pos, val = mps_entries(sections['RHS'], rowid, filename)
+        sm.rhs[pos[pos < len(rows)]] = val[pos < len(rows)]
+
+    sm.lb, sm.ub = np.zeros(sm.num_vars), np.ones(sm.num_vars)
+    if 'BOUNDS' in sections:
+        bounds = sections['BOUNDS']
+        col = pd.Index(colnames).get_indexer(bounds[2])
+        if (col < 0).any():
+            raise ValueError(filename + ' has bounds for unknown columns, ' + str(bounds[2][col < 0].iloc[0]))
+        val = bounds[3].fillna(1.0).to_numpy(dtype=float)
+        for kinds, arr in ((('UP', 'FX'), sm.ub), (('LO', 'FX'), sm.lb)):
+            hit = bounds[0].isin(kinds).to_numpy()
+            arr[col[hit]] = val[hit]
+    return sm
+
+
+def save_model(sm, base, maxpanels):
+    """Write base.mps.gz and the base.npz column mapping with the panel columns per company of the schedule"""
+    write_mps(sm, base + '.mps.gz')
+    tmp = base + '.npz.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, slots=np.asarray(sm.slots), companies=np.asarray(sm.companies), names=np.asarray(sm.names), pair_c=sm.pair_c,
+                 pair_n=sm.pair_n, var_s=sm.var_s, var_p=sm.var_p, var_len=sm.var_len, maxpanels=np.asarray(maxpanels),
+                 families=np.asarray([f for f, begin, end in sm.families]), bounds=np.asarray([[begin, end] for f, begin, end in sm.families]),
+                 removed=np.asarray([sm.removed['variables'], sm.removed['rows']]))
+    os.replace(tmp, base + '.npz')
+
+
+def load_model(base):
+    """The SparseModel stored as base.mps.gz and base.npz and the panel columns per company of the schedule"""
+    with np.load(base + '.npz', allow_pickle=False) as data:
+        m = dict((k, data[k]) for k in data.files)
+    sm = SparseModel(m['slots'].tolist(), m['companies'].tolist(), m['names'].tolist(), m['pair_c'], m['pair_n'])
+    sm.var_s, sm.var_p, sm.var_len = m['var_s'], m['var_p'], m['var_len']
+    sm.families = [(f, int(begin), int(end)) for f, (begin, end) in zip(m['families'].tolist(), m['bounds'].reshape(-1, 2))]
+    sm.removed = dict(variables=int(m['removed'][0]), rows=int(m['removed'][1]))
+    return read_mps(base + '.mps.gz', sm), m['maxpanels'].tolist()
+
+
+def save_state(filename, sm=None, **arrays):
+    """Write the arrays and label lists and the model sm, when there is one, as one .npz, None values are left out"""
+    state = dict((k, np.asarray(v)) for k, v in arrays.items() if v is not None)
+    if sm is not None:
+        state.update(('model_' + k, getattr(sm, k)) for k in MODEL_ARRAYS)
+        state.update(model_families=np.asarray([f for f, begin, end in sm.families]),
+                     model_bounds=np.asarray([[begin, end] for f, begin, end in sm.families]).reshape(-1, 2),
+                     model_removed=np.asarray([sm.removed['variables'], sm.removed['rows']]))
+    tmp = filename + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, **state)
+    os.replace(tmp, filename)
+
+
+def load_state(filename):
+    """Arrays of a state file with label arrays as lists of str, and its model over slots, companies, names and pairs or None"""
+    with np.load(filename, allow_pickle=False) as data:
+        state = dict((k, data[k]) for k in data.files)
+    model = dict((k[len('model_'):], state.pop(k)) for k in list(state) if k.startswith('model_'))
+    for k, v in state.items():
+        if v.dtype.kind == 'U':
+            state[k] = v.tolist()
+    if not model:
+        return state, None
+    sm = SparseModel(state['slots'], state['companies'], state['names'], state['pair_c'], state['pair_n'])
+    for k in MODEL_ARRAYS:
+        setattr(sm, k, model[k])
+    sm.families = [(f, int(begin), int(end)) for f, (begin, end) in zip(model['families'].tolist(), model['bounds'])]
+    sm.removed = dict(variables=int(model['removed'][0]), rows=int(model['removed'][1]))
+    return state, sm
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('model', help='Model stored by InterviewScheduler --write-model, its .npz mapping is read from next to it',
+                        metavar='model.mps.gz')
+    parser.add_argument('-o', '--output', help='Output directory', default='out')
+    parser.add_argument('--solver', help='MIP solver backend', choices=SOLVERS, default='gurobi')
+    parser.add_argument('--time-limit', help='Seconds after which the solver stops with the best schedule found', type=float)
+    parser.add_argument('--mip-gap', help='Relative gap between the schedule and the bound at which the solver stops', type=float)
+    parser.add_argument('--threads', help='Solver threads, defaults to the solver default', type=int)
+
+    args = parser.parse_args()
+    if not os.path.exists(args.output):
+        os.makedirs(args.output)
+    sm, maxpanels = load_model(args.model[:-len('.mps.gz')] if args.model.endswith('.mps.gz') else args.model)
+    print(str(sm.num_vars) + ' variables, ' + str(sm.num_rows) + ' constraints')
+    x, status = solve(sm, args.solver, threads=args.threads, time_limit=args.time_limit, mip_gap=args.mip_gap)
+    print(status)
+    print('Objective ' + str(sm.objective) + ' bound ' + str(sm.bound))
+    s, p = sm.allocated(x)
+    write_atomic(schedule_frame(sm.slots, sm.companies, maxpanels, sm.names, sm.pair_c, sm.pair_n, s, p), args.output + '\\sche.csv')
+    write_atomic(names_frame(sm.slots, sm.companies, sm.names, sm.pair_c, sm.pair_n, s, p), args.output + '\\names.csv')
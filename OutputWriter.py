@@ -0,0 +1,96 @@
+"""
+    Bulk builders for the sche.csv and names.csv outputs.
+
+    Allocations are passed as parallel arrays of slot and pair indices, so both tables are filled
+    with a single fancy-indexed assignment instead of scanning the solution per slot and company.
+    Files are replaced atomically, so a planner opening them during a solve never sees half a table.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def schedule_frame(slots, companies, maxpanels, names, pair_c, pair_n, alloc_s, alloc_p, numbered=True):
+    """
+    Slots x panels table with the names interviewed by each company filled from its first panel, in shortlist order.
+    Panel columns are named company1, company2, ... or just the company when numbered is False.
+    """
+    alloc_s, alloc_p = np.asarray(alloc_s, dtype=np.int64), np.asarray(alloc_p, dtype=np.int64)
+    pair_c, pair_n = np.asarray(pair_c), np.asarray(pair_n)
+    width = np.asarray(maxpanels, dtype=np.int64)
+    offset = np.concatenate(([0], np.cumsum(width)[:-1]))
+    order = np.lexsort((alloc_p, pair_c[alloc_p], alloc_s))
+    s, p = alloc_s[order], alloc_p[order]
+    c = pair_c[p]
+    # Position of each allocation within its (slot, company) group
+    key = s * len(companies) + c
+    first = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.zeros(0, dtype=np.int64)
+    pos = np.arange(len(key)) - np.repeat(first, np.diff(np.r_[first, len(key)]))
+    grid = np.full((len(slots), int(width.sum())), '', dtype=object)
+    grid[s, offset[c] + pos] = np.asarray(names, dtype=object)[pair_n[p]]
+    columns = [cn + str(j + 1) if numbered else cn for cn, w in zip(companies, width) for j in range(w)]
+    return pd.DataFrame(grid, index=pd.Index(slots, name='Slot'), columns=columns)
+
+
+def names_frame(slots, companies, names, pair_c, pair_n, alloc_s, alloc_p):
+    """Slots x names table with the company each name is interviewed by, every slot is a row and only names with an allocation are kept"""
+    alloc_s, alloc_p = np.asarray(alloc_s, dtype=np.int64), np.asarray(alloc_p, dtype=np.int64)
+    n = np.asarray(pair_n)[alloc_p]
+    grid = np.full((len(slots), len(names)), np.nan, dtype=object)
+    grid[alloc_s, n] = np.asarray(companies, dtype=object)[np.asarray(pair_c)[alloc_p]]
+    cols = np.unique(n)
+    df = pd.DataFrame(grid[:, cols], index=list(slots), columns=[names[i] for i in cols])
+    return df.sort_index(axis=1)
+
+
+def write_atomic(df, filename):
+    """Write the frame as CSV to a temporary file next to filename and rename it over filename"""
+    tmp = filename + '.tmp'
+    df.to_csv(tmp)
+    os.replace(tmp, filename)
+
+
+class IncumbentWriter(object):
+    """
+    Solver callback for improving solutions. Called with the solution vector and its objective, it keeps a copy and
+    a background thread passes the latest one to write at most once every interval seconds, so the solver thread never
+    waits for the output.
+    """
+
+    def __init__(self, write, interval=10.0):
+        self.write = write
+        self.interval = interval
+        self.last = -np.inf
+        self.pending = None
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.closed = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def __call__(self, x, objective):
+        with self.lock:
+            self.pending = (np.array(x, dtype=float), objective)
+        self.ready.set()
+
+    def _run(self):
+        while True:
+            self.ready.wait()
+            # Wait out the interval since the last write, a newer solution replaces the pending one meanwhile
+            if self.closed.wait(max(0.0, self.last + self.interval - time.perf_counter())):
+                return
+            with self.lock:
+                item, self.pending = self.pending, None
+                self.ready.clear()
+            if item is not None:
+                self.write(*item)
+                self.last = time.perf_counter()
+
+    def close(self):
+        """Stop the writer after any write in progress, pending solutions are dropped for the final output"""
+        self.closed.set()
+        self.ready.set()
+        self.thread.join()
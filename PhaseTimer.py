@@ -0,0 +1,56 @@
+"""
+    Wall clock timing of the scheduler phases.
+
+    Each lap adds the time since the previous lap to a phase, so the phases add up to the run time.
+    The report with the model size and the peak resident memory of the process is written as
+    timing.json next to sche.csv.
+"""
+import json
+import sys
+import time
+
+
+def peak_rss_mb():
+    """Peak resident memory of the process in MB, None where it cannot be read"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes and macOS bytes
+    return rss / 2 ** 20 if sys.platform == 'darwin' else rss / 2 ** 10
+
+
+def phase_totals(timings):
+    """(phase, seconds) list -> dict of seconds per phase in first seen order"""
+    totals = dict()
+    for phase, seconds in timings:
+        totals[phase] = totals.get(phase, 0.0) + seconds
+    return totals
+
+
+class PhaseTimer(object):
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.timings = []
+        self.info = dict()
+
+    def lap(self, phase):
+        """Add the time since the previous lap to the phase"""
+        now = time.perf_counter()
+        self.timings.append((phase, now - self.last))
+        self.last = now
+
+    def record(self, **info):
+        self.info.update(info)
+
+    def report(self):
+        return dict(phases=phase_totals(self.timings), total=time.perf_counter() - self.start, peak_rss_mb=peak_rss_mb(), **self.info)
+
+    def write(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.report(), f, indent=2, default=str)
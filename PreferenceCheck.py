@@ -0,0 +1,23 @@
+"""
+    Preference order check of a schedule.
+
+    Candidates should meet companies in the order of their preference ranks. Interviews are sorted by
+    candidate and slot once and every drop in rank between consecutive interviews is a violation.
+"""
+import numpy as np
+
+
+def preference_violations(assign, rank):
+    """
+    Violations per candidate of an assignment given as (name, slot, company) index rows against a names x companies
+    array of ranks, 1 being the most preferred. Returns the number of violations and the total rank drop per name.
+    """
+    assign = np.asarray(assign, dtype=np.int64).reshape(-1, 3)
+    rank = np.asarray(rank)
+    order = np.lexsort((assign[:, 2], assign[:, 1], assign[:, 0]))
+    n, c = assign[order, 0], assign[order, 2]
+    step = np.diff(rank[n, c])
+    bad = (n[1:] == n[:-1]) & (step < 0)
+    count = np.bincount(n[1:][bad], minlength=rank.shape[0])
+    magnitude = np.bincount(n[1:][bad], weights=-step[bad], minlength=rank.shape[0])
+    return count, magnitude
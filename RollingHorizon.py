@@ -0,0 +1,64 @@
+"""
+    Rolling horizon decomposition of the interview allocation model.
+
+    Slots are scheduled in windows of a few slots with a look-ahead. Each window is solved as a
+    small MIP, its first slots are committed and the remaining demand per company is carried
+    forward. Contiguity blocks are never cut since the look-ahead covers the longest interview.
+"""
+import numpy as np
+
+from ModelBuilder import build_model, freeze_slots, solve
+
+
+def objective_value(obj, allocations):
+    """Objective of (slot, pair) allocations under a (pairs x slots) cost array"""
+    allocations = np.asarray(allocations, dtype=np.int64).reshape(-1, 2)
+    return float(np.asarray(obj)[allocations[:, 1], allocations[:, 0]].sum())
+
+
+def rolling_schedule(slots, companies, names, panels, pair_c, pair_n, slots_int, demand, obj, fixed=(), window=5, lookahead=2,
+                     solver='gurobi', past=(), first=0, threads=None, blocks=False, time_limit=None, mip_gap=None):
+    """
+    Schedule slots from index first onwards in windows and return the (slot, pair) allocations including past.
+
+    demand is the number of slots to allocate per company over the whole horizon and obj the (pairs x slots) cost
+    array. Each window maximises the allocations up to the remaining demand before minimising cost, so a window never
+    turns infeasible but greedy windows can leave part of the demand unallocated. time_limit and mip_gap apply to every window.
+    """
+    panels, slots_int = np.asarray(panels), np.asarray(slots_int)
+    nslots = len(slots)
+    lookahead = max(lookahead, int(slots_int.max(initial=1)) - 1)
+    allocations = [tuple(a) for a in past]
+    t = first
+    while t < nslots:
+        end = min(t + window + lookahead, nslots)
+        keep, block_start, need, wfixed, forbid = freeze_slots(panels[:end], pair_c, slots_int, allocations, t)
+        kept = np.flatnonzero(keep)
+        newidx = np.cumsum(keep) - 1
+        done = np.bincount(np.asarray(pair_c)[[p for s, p in allocations]], minlength=len(companies))
+        wdemand = np.minimum(need, np.maximum(np.asarray(demand) - done, 0))
+        wobj = obj[kept][:, t:end]
+        # Reward every allocation above the largest cost so windows fill up before later slots are considered
+        wobj = wobj - (np.abs(wobj).max(initial=0) + 1)
+        wfixed = wfixed + [(s - t, newidx[p]) for s, p in fixed if t <= s < end and keep[p]]
+        sm = build_model(slots[t:end], companies, names, panels[t:end], pair_c[kept], pair_n[kept], slots_int, demand=wdemand,
+                         demand_sense='<', obj=wobj, fixed=wfixed, forbid=forbid, block_start=block_start, blocks=blocks)
+        x, status = solve(sm, solver, threads=threads, time_limit=time_limit, mip_gap=mip_gap)
+        print('Window ' + str(slots[t]) + ' - ' + str(slots[end - 1]) + ': ' + str(status))
+        alloc_s, alloc_p = sm.allocated(x)
+        commit = (alloc_s < window) | (end == nslots)
+        allocations += [(t + s, kept[p]) for s, p in zip(alloc_s[commit], alloc_p[commit])]
+        t = end if end == nslots else t + window
+    left = np.asarray(demand) - np.bincount(np.asarray(pair_c)[[p for s, p in allocations]], minlength=len(companies))
+    for c, v in zip(companies, left):
+        if v > 0:
+            print(c + ' has ' + str(v) + ' slots left unallocated by the rolling horizon')
+    return allocations
+
+
+def lp_bound(slots, companies, names, panels, pair_c, pair_n, slots_int, demand, obj, fixed=(), solver='gurobi', threads=None, blocks=False,
+             time_limit=None):
+    """LP relaxation bound of the monolithic model"""
+    sm = build_model(slots, companies, names, panels, pair_c, pair_n, slots_int, demand=demand, obj=obj, fixed=fixed, blocks=blocks)
+    solve(sm, solver, relax=True, threads=threads, time_limit=time_limit)
+    return float(sm.bound)
@@ -0,0 +1,128 @@
+"""
+    Solve several SlotsPanels.csv scenarios against the same shortlists in parallel.
+
+    The base inputs are parsed once and shared with a pool of worker processes. Each scenario is
+    written to its own output directory and the results are compared in comparison.csv.
+"""
+import argparse
+import contextlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from InputLoader import load_frame, read_csv
+from InterviewScheduler import generateSchedule, read_input_csv, read_inputs, read_lp, remove_left_process
+from ModelBuilder import SOLVERS
+
+_base = None
+
+
+def _init(base):
+    global _base
+    _base = base
+
+
+def read_scenarios(path):
+    """Directory of SlotsPanels CSVs or a manifest CSV with scenario and slotspanels columns -> list of (scenario, file)"""
+    if os.path.isdir(path):
+        return [(os.path.splitext(f)[0], os.path.join(path, f)) for f in sorted(os.listdir(path)) if f.lower().endswith('.csv')]
+    manifest = read_csv(path, dtype=str)
+    manifest.columns = manifest.columns.str.strip().str.lower()
+    folder = os.path.dirname(path)
+    return [(s.strip(), os.path.join(folder, f.strip())) for s, f in zip(manifest['scenario'], manifest['slotspanels'])]
+
+
+def read_scenario_panels(filename, companies, engine='c'):
+    """Slots x companies panels of a scenario, companies missing from the file get no panels"""
+    panelsdf = load_frame(filename, engine=engine)
+    extra = set(panelsdf.columns) - set(companies)
+    if extra:
+        raise ValueError('Companies ' + ', '.join(sorted(extra)) + ' in ' + filename + ' are not in the base SlotsPanels')
+    panelsdf = panelsdf.reindex(columns=companies, fill_value=0)
+    panels = panelsdf.to_numpy()
+    if not np.issubdtype(panels.dtype, np.integer) or (panels < 0).any():
+        raise ValueError('The number of panels must be a positive integer ')
+    return list(panelsdf.index), panels
+
+
+def run_scenario(scenario, panelsfile, out):
+    b = _base
+    if panelsfile is None:
+        slots, panels = b['slots'], b['panels']
+    else:
+        slots, panels = read_scenario_panels(panelsfile, b['companies'], b['engine'])
+    fixedints = dict((s, v) for s, v in b['fixedints'].items() if s in slots)
+    if not os.path.exists(out):
+        os.makedirs(out)
+    with open(out + '\\log.txt', 'w') as log, contextlib.redirect_stdout(log):
+        result = generateSchedule(b['companies'], fixedints, b['names'], panels, b['prefs'], b['pair_c'], b['pair_n'], slots, b['slots_int'], out,
+                                  b['solver'], method=b['method'], threads=b['threads'], blocks=b['blocks'], time_limit=b['time_limit'],
+                                  mip_gap=b['mip_gap'])
+    result['scenario'] = scenario
+    return result
+
+
+def comparison_table(results, companies):
+    rows = [[r['scenario'], r['status'], r['objective'], r['violations'], r['magnitude'], sum(r['unscheduled'].values())] +
+            [r['unscheduled'][c] for c in companies] for r in results]
+    return pd.DataFrame(rows, columns=['Scenario', 'Status', 'Objective', 'Violations', 'Rank drop', 'Unscheduled'] + list(companies))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('shortlists', help='Shortlists File per company as CSV', metavar='Shortlists.csv')
+    parser.add_argument('slotspanels', help='Base Slots and Panels per company as CSV', metavar='SlotsPanels.csv')
+    parser.add_argument('scenarios', help='Directory of SlotsPanels CSVs or a manifest CSV with scenario and slotspanels columns',
+                        metavar='scenarios')
+    parser.add_argument('-s', '--slotsint', help='Number of Slots required per Interview for each company', metavar='SlotsInterview.csv')
+    parser.add_argument('-p', '--prefs', help='CSV with a matrix containing names and companies', metavar='prefs.csv')
+    parser.add_argument('-l', '--leftprocess', help='CSV with a list of candidates who have left the process', metavar='lp.csv')
+    parser.add_argument('-f', '--fixed', help='CSV of the schedule with pre fixed candidates. Should satisfy constraints', metavar='fixed.csv')
+    parser.add_argument('-o', '--output', help='Output directory, each scenario is written to a sub directory', default='out')
+    parser.add_argument('--method', help='Solve each scenario as one model or with the greedy heuristic', choices=['mip', 'greedy'],
+                        default='mip')
+    parser.add_argument('--formulation', help='One variable per slot with contiguity constraints or one variable per interview block',
+                        choices=['slots', 'blocks'], default='slots')
+    parser.add_argument('--solver', help='MIP solver backend', choices=SOLVERS, default='gurobi')
+    parser.add_argument('--engine', help='CSV parser engine', choices=['c', 'pyarrow'], default='c')
+    parser.add_argument('--workers', help='Scenarios solved at the same time, defaults to the number of scenarios up to the cores', type=int)
+    parser.add_argument('--threads', help='Solver threads shared by all workers, defaults to the number of cores', type=int)
+    parser.add_argument('--time-limit', help='Seconds after which the solver stops with the best schedule found for a scenario', type=float)
+    parser.add_argument('--mip-gap', help='Relative gap between the schedule and the bound at which the solver stops', type=float)
+
+    args = parser.parse_args()
+
+    scenarios = [('base', None)] + read_scenarios(args.scenarios)
+    cores = args.threads or os.cpu_count() or 1
+    workers = args.workers or min(len(scenarios), cores)
+    threads = max(1, cores // workers)
+    print('Solving ' + str(len(scenarios)) + ' scenarios with ' + str(workers) + ' workers of ' + str(threads) + ' threads')
+
+    base = read_inputs(args.shortlists, args.slotspanels, args.slotsint, args.prefs, args.engine)
+    lp = list()
+    if args.leftprocess:
+        lp = read_lp(args.leftprocess)
+    base['names'], base['pair_c'], base['pair_n'], base['prefs'] = remove_left_process(base['names'], base['pair_c'], base['pair_n'],
+                                                                                        base['prefs'], lp)
+    base['fixedints'] = dict()
+    if args.fixed:
+        base['fixedints'] = read_input_csv(args.fixed, typ=object)[0]
+    base.update(engine=args.engine, solver=args.solver, method=args.method, threads=threads, blocks=args.formulation == 'blocks',
+                time_limit=args.time_limit, mip_gap=args.mip_gap)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(base,)) as pool:
+        futures = [pool.submit(run_scenario, s, f, args.output + '\\' + s) for s, f in scenarios]
+        results = list()
+        for (s, f), future in zip(scenarios, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(s + ' failed: ' + str(e))
+            else:
+                print(s + ': ' + results[-1]['status'])
+
+    table = comparison_table(results, base['companies'])
+    table.to_csv(args.output + '\\comparison.csv', index=False)
+    print(table.to_string(index=False))
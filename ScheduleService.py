@@ -0,0 +1,349 @@
+"""
+    Local scheduling service that keeps an interview day in memory between changes.
+
+    The inputs are parsed and the model is built once. Changes arrive as JSON lines over a localhost
+    socket and are applied to the model in memory, candidates leaving and fixed allocations as bounds
+    and right hand sides, panel changes by rebuilding from the parsed inputs. Every change is solved
+    again from the current schedule and sche.csv and names.csv are rewritten. A fix that clashes with
+    the panels, the candidate or the demand, or leaves no schedule, is refused. For example
+        {"op": "left", "names": ["Cand0042"]}
+        {"op": "panels", "slot": "Slots_07", "company": "Comp03", "panels": 2}
+        {"op": "fix", "slot": "Slots_03", "company": "Comp01", "name": "Cand0007"}
+        {"op": "unfix", "slot": "Slots_03", "company": "Comp01", "name": "Cand0007"}
+        {"op": "status"} or {"op": "stop"}
+    Each request is answered with one JSON line holding the status and objective of the schedule.
+
+    A session can also start from the state file of InterviewScheduler --save-state, and with --withdraw
+    it takes the candidates who left out of that schedule, solves once, saves the state back and exits.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import numpy as np
+
+from FeasibilityCheck import precheck
+from GreedyScheduler import greedy_schedule
+from InputLoader import drop_names
+from InterviewScheduler import read_input_csv, read_inputs, read_lp, remove_left_process
+from ModelBuilder import SOLVERS, block_capacity, build_model, objective_coefficients, pair_ranks, solve
+from ModelStore import load_state, save_state
+from OutputWriter import names_frame, schedule_frame, write_atomic
+
+
+class ScheduleSession(object):
+    """Inputs, model and schedule of one interview day, allocations are (slot, pair) index arrays. The model is built on first use"""
+
+    def __init__(self, companies, names, panels, prefs, pair_c, pair_n, slots, slots_int, out, solver='gurobi', fixedints=None,
+                 blocks=False, threads=None, time_limit=None, mip_gap=None):
+        # Names without shortlists are not scheduled
+        crit = np.bincount(pair_n, minlength=len(names))
+        self.names, self.pair_c, self.pair_n = drop_names(names, pair_c, pair_n, [n for n, v in zip(names, crit) if v == 0])
+        self.crit = crit[crit > 0]
+        self.companies, self.slots, self.out = list(companies), list(slots), out
+        self.panels, self.slots_int = np.array(panels), np.asarray(slots_int)
+        self.maxpanels = self.panels.max(axis=0)
+        self.rank = None if prefs is None else pair_ranks(self.pair_c, self.pair_n, prefs[crit > 0][self.pair_n, self.pair_c])
+        self.solver, self.blocks, self.threads, self.time_limit, self.mip_gap = solver, blocks, threads, time_limit, mip_gap
+        self.sidx = dict((s, i) for i, s in enumerate(self.slots))
+        self.pairid = dict(((self.companies[c], self.names[n]), i) for i, (c, n) in enumerate(zip(self.pair_c, self.pair_n)))
+        # Pairs of candidates still in the process
+        self.active = np.ones(len(self.pair_c), dtype=bool)
+        self.fixed = [(self.sidx[s], self.pairid[c, n]) for s, vals in (fixedints or dict()).items() for c, n in vals.items()
+                      if (c, n) in self.pairid]
+        self.alloc_s = self.alloc_p = np.zeros(0, dtype=np.int64)
+        self.status, self.sm, self.solved = None, None, False
+
+    def costs(self):
+        """Slot cost per pair and the required slots per company over the active pairs, as generateSchedule sets them"""
+        sint, nslots = self.slots_int, len(self.slots)
+        compshortlists = np.bincount(self.pair_c[self.active], minlength=len(self.companies))
+        comppanels = block_capacity(self.panels, sint) if self.blocks else self.panels.sum(axis=0) // sint
+        obj = np.broadcast_to(np.arange(1.0, nslots + 1), (len(self.pair_c), nslots))
+        if self.rank is not None:
+            obj = objective_coefficients(self.rank, self.crit[self.pair_n], (compshortlists > comppanels)[self.pair_c], nslots)
+        return obj, np.minimum(compshortlists, comppanels) * sint
+
+    def build(self):
+        obj, demand = self.costs()
+        gone = np.flatnonzero(~self.active)
+        forbid = np.c_[np.tile(np.arange(len(self.slots)), len(gone)), np.repeat(gone, len(self.slots))]
+        self.sm = build_model(self.slots, self.companies, self.names, self.panels, self.pair_c, self.pair_n, self.slots_int, demand=demand,
+                              obj=obj, fixed=self.fixed, forbid=forbid, blocks=self.blocks)
+
+    def remove_names(self, names):
+        """Candidates who left, their variables are bounded to 0 and the demand and objective follow the shorter shortlists"""
+        nidx = dict((n, i) for i, n in enumerate(self.names))
+        drop = self.active & np.isin(self.pair_n, [nidx[n] for n in names if n in nidx])
+        self.active &= ~drop
+        self.fixed = [(s, p) for s, p in self.fixed if self.active[p]]
+        keep = self.active[self.alloc_p]
+        self.alloc_s, self.alloc_p = self.alloc_s[keep], self.alloc_p[keep]
+        sm = self.sm
+        if sm is None:
+            return int(drop.sum())
+        gone = drop[sm.var_p]
+        sm.lb[gone], sm.ub[gone] = 0, 0
+        obj, demand = self.costs()
+        v, s = sm.cover()
+        sm.obj = np.bincount(v, weights=obj[sm.var_p[v], s], minlength=sm.num_vars)
+        for family, begin, end in sm.families:
+            if family == 'demand':
+                sm.rhs[begin:end] = demand
+        return int(drop.sum())
+
+    def slot_index(self, slot):
+        if slot not in self.sidx:
+            raise ValueError(str(slot) + ' is not a slot')
+        return self.sidx[slot]
+
+    def company_index(self, company):
+        if company not in self.companies:
+            raise ValueError(str(company) + ' is not a company')
+        return self.companies.index(company)
+
+    def set_panels(self, slot, company, panels):
+        """New number of panels of a company in a slot, the model is rebuilt as panels decide which variables exist"""
+        if panels < 0:
+            raise ValueError('The number of panels must be a positive integer ')
+        self.panels[self.slot_index(slot), self.company_index(company)] = panels
+        self.maxpanels = np.maximum(self.maxpanels, self.panels.max(axis=0))
+        self.build()
+
+    def pair_index(self, company, name):
+        self.company_index(company)
+        if (company, name) not in self.pairid or not self.active[self.pairid[company, name]]:
+            raise ValueError(str(name) + ' is not shortlisted by ' + company)
+        return self.pairid[company, name]
+
+    def fixed_errors(self, fixed):
+        """Errors precheck finds with the fixed allocations that it does not find with the current ones"""
+        obj, demand = self.costs()
+        act = np.flatnonzero(self.active)
+        pos = np.cumsum(self.active) - 1
+        inputs = dict(slots=self.slots, companies=self.companies, names=self.names, panels=self.panels, pair_c=self.pair_c[act],
+                      pair_n=self.pair_n[act], slots_int=self.slots_int, demand=demand, blocks=self.blocks)
+        current = set(precheck(fixed=[(s, pos[p]) for s, p in self.fixed], **inputs)[0])
+        return [e for e in precheck(fixed=[(s, pos[p]) for s, p in fixed], **inputs)[0] if e not in current]
+
+    def fix(self, slot, company, name):
+        """Fix the candidate to the company in the slot, fixes that clash with the panels, the candidate or the demand are refused"""
+        s, p = self.slot_index(slot), self.pair_index(company, name)
+        if self.sm is None:
+            self.build()
+        v = self.sm.varid()[s, p]
+        if v < 0:
+            raise ValueError(company + ' cannot interview ' + name + ' in ' + slot)
+        if any(q == p for r, q in self.fixed):
+            raise ValueError(name + ' is already fixed with ' + company + ', unfix it first')
+        errors = self.fixed_errors(self.fixed + [(s, p)])
+        if errors:
+            raise ValueError('Fixing ' + name + ' with ' + company + ' in ' + slot + ' is infeasible: ' + '; '.join(errors))
+        self.fixed.append((s, p))
+        self.sm.lb[v] = 1
+
+    def unfix(self, slot, company, name):
+        """Release a fixed allocation, the candidate stays where the next solve puts it"""
+        s, p = self.slot_index(slot), self.pair_index(company, name)
+        if (s, p) not in self.fixed:
+            raise ValueError(name + ' is not fixed with ' + company + ' in ' + slot)
+        self.fixed.remove((s, p))
+        if self.sm is not None:
+            ids = self.sm.varid()
+            self.sm.lb[ids[s, p]] = 0
+            # Slots of one block variable share it
+            for r, q in self.fixed:
+                self.sm.lb[ids[r, q]] = 1
+
+    def optimise(self):
+        """Solve from the current schedule, keep and write the new schedule if one is found"""
+        clock = time.perf_counter()
+        if self.sm is None:
+            self.build()
+        sm = self.sm
+        # Fill the interviews freed by candidates who left around the current schedule, so the solver starts from a complete schedule
+        obj, demand = self.costs()
+        act = np.flatnonzero(self.active)
+        pos = np.cumsum(self.active) - 1
+        # Fixed allocations first, a pair being fixed leaves the slot it had
+        moved = np.isin(self.alloc_p, [p for s, p in self.fixed])
+        kept = [(s, pos[p]) for s, p in self.fixed] + list(zip(self.alloc_s[~moved].tolist(), pos[self.alloc_p[~moved]].tolist()))
+        filled = greedy_schedule(self.panels, self.pair_c[act], self.pair_n[act], len(self.names), self.slots_int, demand, obj[act], kept,
+                                 passes=0)
+        fs, fp = np.asarray(filled, dtype=np.int64).reshape(-1, 2).T
+        start = np.zeros(sm.num_vars)
+        ids = sm.varid()[fs, act[fp]]
+        start[ids[ids >= 0]] = 1
+        # A start that is a feasible schedule is passed whole, the solver then has a schedule from its first node
+        x, self.status = solve(sm, self.solver, start=start, threads=self.threads, time_limit=self.time_limit, mip_gap=self.mip_gap,
+                               complete_start=sm.feasible(start))
+        self.solved = len(x) == sm.num_vars
+        if self.solved:
+            self.alloc_s, self.alloc_p = sm.allocated(x)
+            self.write()
+        return dict(self.summary(), seconds=time.perf_counter() - clock)
+
+    def write(self):
+        write_atomic(schedule_frame(self.slots, self.companies, self.maxpanels, self.names, self.pair_c, self.pair_n, self.alloc_s, self.alloc_p),
+                     self.out + '\\sche.csv')
+        write_atomic(names_frame(self.slots, self.companies, self.names, self.pair_c, self.pair_n, self.alloc_s, self.alloc_p),
+                     self.out + '\\names.csv')
+
+    def summary(self):
+        sm = self.sm
+        return dict(status=str(self.status), objective=float(np.nan if sm is None else sm.objective), bound=float(np.nan if sm is None else sm.bound),
+                    allocations=len(self.alloc_s), variables=0 if sm is None else sm.num_vars,
+                    candidates=len(np.unique(self.pair_n[self.active])))
+
+    def apply(self, request):
+        """Apply one request dict and return its answer"""
+        op = request.get('op')
+        if op == 'status':
+            return self.summary()
+        if op == 'left':
+            print(str(self.remove_names(request['names'])) + ' shortlists removed')
+        elif op == 'panels':
+            self.set_panels(request['slot'], request['company'], int(request['panels']))
+        elif op == 'fix':
+            self.fix(request['slot'], request['company'], request['name'])
+            status, objective, bound = self.status, self.sm.objective, self.sm.bound
+            answer = self.optimise()
+            if not self.solved:
+                # A fix without a schedule is taken back and the previous schedule stays
+                self.unfix(request['slot'], request['company'], request['name'])
+                self.status, self.sm.objective, self.sm.bound = status, objective, bound
+                raise ValueError('No schedule with ' + request['name'] + ' fixed with ' + request['company'] + ' in ' + request['slot'] +
+                                 ' (' + answer['status'] + '), the fix is taken back')
+            return answer
+        elif op == 'unfix':
+            self.unfix(request['slot'], request['company'], request['name'])
+        elif op != 'solve':
+            raise ValueError('Unknown op ' + str(op))
+        return self.optimise()
+
+
+def save_session(session, filename):
+    """Write the session to a state file, the model is included once it is built"""
+    sm = session.sm
+    save_state(filename, sm, alloc_s=session.alloc_s, alloc_p=session.alloc_p, companies=session.companies, names=session.names,
+               slots=session.slots, panels=session.panels, pair_c=session.pair_c, pair_n=session.pair_n, slots_int=session.slots_int,
+               rank=session.rank, fixed=np.asarray(session.fixed, dtype=np.int64).reshape(-1, 2), active=session.active, blocks=session.blocks,
+               status=str(session.status), objective=None if sm is None else sm.objective, bound=None if sm is None else sm.bound)
+
+
+def load_session(filename, out, solver='gurobi', threads=None, time_limit=None, mip_gap=None):
+    """Session of a state file written by save_session or InterviewScheduler --save-state, writing its schedules to out"""
+    state, sm = load_state(filename)
+    session = ScheduleSession(state['companies'], state['names'], state['panels'], None, state['pair_c'], state['pair_n'], state['slots'],
+                              state['slots_int'], out, solver, blocks=bool(state['blocks']), threads=threads, time_limit=time_limit,
+                              mip_gap=mip_gap)
+    session.rank = state.get('rank')
+    session.active, session.fixed = state['active'], [tuple(sp) for sp in state['fixed'].tolist()]
+    session.alloc_s, session.alloc_p, session.status = state['alloc_s'], state['alloc_p'], state['status']
+    if sm is not None:
+        sm.objective, sm.bound = float(state.get('objective', np.nan)), float(state.get('bound', np.nan))
+    session.sm = sm
+    return session
+
+
+def withdraw(filename, names, out, solver='gurobi', threads=None, time_limit=None, mip_gap=None):
+    """Take the candidates who left out of the schedule in a state file, solve from the rest of it and save the state back"""
+    session = load_session(filename, out, solver, threads, time_limit, mip_gap)
+    print(str(session.remove_names(names)) + ' shortlists removed')
+    result = session.optimise()
+    save_session(session, filename)
+    return result
+
+
+async def serve(session, host='127.0.0.1', port=8765):
+    """Answer JSON line requests on host:port until a stop request, one request is applied at a time"""
+    lock, stop = asyncio.Lock(), asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    async def handle(reader, writer):
+        while not stop.is_set():
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError('A request must be a JSON object')
+                if request.get('op') == 'stop':
+                    stop.set()
+                    answer = dict(status='stopped')
+                else:
+                    # The solve runs in a worker thread so other connections are still accepted
+                    async with lock:
+                        answer = await loop.run_in_executor(None, session.apply, request)
+            except KeyError as e:
+                answer = dict(error='The request has no ' + str(e.args[0]) + ' field')
+            except ValueError as e:
+                answer = dict(error=str(e))
+            except Exception as e:
+                # Any other failure is answered too, so the connection stays open for the next request
+                answer = dict(error=type(e).__name__ + ': ' + str(e))
+            print(line.decode().strip() + ' -> ' + json.dumps(answer))
+            writer.write((json.dumps(answer) + '\n').encode())
+            await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print('Listening on ' + host + ':' + str(port))
+    async with server:
+        await stop.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('shortlists', help='Shortlists File per company as CSV', metavar='Shortlists.csv', nargs='?')
+    parser.add_argument('slotspanels', help='Slots and Panels per company as CSV', metavar='SlotsPanels.csv', nargs='?')
+    parser.add_argument('-s', '--slotsint', help='Number of Slots required per Interview for each company', metavar='SlotsInterview.csv')
+    parser.add_argument('-p', '--prefs', help='CSV with a matrix containing names and companies', metavar='prefs.csv')
+    parser.add_argument('-l', '--leftprocess', help='CSV with a list of candidates who have left the process', metavar='lp.csv')
+    parser.add_argument('-f', '--fixed', help='CSV of the schedule with pre fixed candidates. Should satisfy constraints', metavar='fixed.csv')
+    parser.add_argument('-o', '--output', help='Output directory', default='out')
+    parser.add_argument('--formulation', help='One variable per slot with contiguity constraints or one variable per interview block',
+                        choices=['slots', 'blocks'], default='slots')
+    parser.add_argument('--solver', help='MIP solver backend', choices=SOLVERS, default='gurobi')
+    parser.add_argument('--time-limit', help='Seconds after which the solver stops with the best schedule found', type=float)
+    parser.add_argument('--mip-gap', help='Relative gap between the schedule and the bound at which the solver stops', type=float)
+    parser.add_argument('--threads', help='Solver threads, defaults to the solver default', type=int)
+    parser.add_argument('--state', help='State file of InterviewScheduler --save-state to start from instead of the CSVs, it is saved '
+                        'back when the service stops', metavar='state.npz')
+    parser.add_argument('--withdraw', help='With --state, take the candidates in this CSV out of the schedule, solve, save the state and '
+                        'exit', metavar='lp.csv')
+    parser.add_argument('--host', help='Address to listen on', default='127.0.0.1')
+    parser.add_argument('--port', help='Port to listen on', type=int, default=8765)
+
+    args = parser.parse_args()
+    if args.withdraw and not args.state:
+        parser.error('--withdraw needs the state file of the previous run as --state')
+    if not args.state and not args.slotspanels:
+        parser.error('Shortlists.csv and SlotsPanels.csv are needed without --state')
+    if not os.path.exists(args.output):
+        os.makedirs(args.output)
+    if args.withdraw:
+        print(withdraw(args.state, read_lp(args.withdraw), args.output, args.solver, args.threads, args.time_limit, args.mip_gap))
+    elif args.state:
+        session = load_session(args.state, args.output, args.solver, args.threads, args.time_limit, args.mip_gap)
+        print(session.summary())
+        asyncio.run(serve(session, args.host, args.port))
+        save_session(session, args.state)
+    else:
+        inputs = read_inputs(args.shortlists, args.slotspanels, args.slotsint, args.prefs)
+        lp = list()
+        if args.leftprocess:
+            lp = read_lp(args.leftprocess)
+        names, pair_c, pair_n, prefs = remove_left_process(inputs['names'], inputs['pair_c'], inputs['pair_n'], inputs['prefs'], lp)
+        fixedints = dict()
+        if args.fixed:
+            fixedints = read_input_csv(args.fixed, typ=object)[0]
+
+        session = ScheduleSession(inputs['companies'], names, inputs['panels'], prefs, pair_c, pair_n, inputs['slots'], inputs['slots_int'],
+                                  args.output, args.solver, fixedints, args.formulation == 'blocks', args.threads, args.time_limit,
+                                  args.mip_gap)
+        print(session.optimise())
+        asyncio.run(serve(session, args.host, args.port))
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The schedulers are scripts in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from InstanceGenerator import random_instance  # noqa: E402
+from ModelBuilder import build_model, solve  # noqa: E402
+
+
+@pytest.fixture
+def make_day():
+    """Random interview day as build_model arguments with the demand generateSchedule sets and a random cost per pair and slot"""
+    def make(candidates=30, companies=4, slots=12, multi_slot=0.5, seed=0):
+        sint, pair_c, pair_n, panels, rank = random_instance(candidates, companies, slots, multi_slot=multi_slot, seed=seed)
+        demand = np.minimum(np.bincount(pair_c, minlength=companies), panels.sum(axis=0) // sint) * sint
+        obj = np.random.default_rng(seed).integers(1, 20, (len(pair_c), slots)).astype(float)
+        return dict(slots=['Slots_%02d' % i for i in range(slots)], companies=['Comp%02d' % i for i in range(companies)],
+                    names=['Cand%04d' % i for i in range(candidates)], panels=panels, pair_c=pair_c, pair_n=pair_n, slots_int=sint,
+                    demand=demand, obj=obj)
+    return make
+
+
+@pytest.fixture
+def check_schedule():
+    """Assert that (slot, pair) allocations are whole interviews within the panels, the candidates' slots and the demand of a day"""
+    def check(day, allocations):
+        sm = build_model(demand_sense='<', **day)
+        x = sm.vector([(day['slots'][s], day['companies'][day['pair_c'][p]], day['names'][day['pair_n'][p]]) for s, p in allocations])
+        assert x.sum() == len(allocations) and sm.feasible(x)
+    return check
+
+
+@pytest.fixture
+def mip_objective():
+    """Objective of the whole MIP of a day solved with HiGHS"""
+    pytest.importorskip('highspy')
+
+    def objective(day):
+        sm = build_model(**day)
+        x, status = solve(sm, 'highs')
+        assert status == 'Optimal'
+        return sm.objective
+    return objective
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from FeasibilityCheck import precheck
+from ModelBuilder import build_model, freeze_slots, solve
+
+
+def cut_interview():
+    """One company with 3 slot interviews and two candidates, --from-slot cuts the first interview after two of its slots"""
+    slots = ['Slots_%02d' % i for i in range(9)]
+    panels = np.ones((9, 1), dtype=np.int64)
+    pair_c, pair_n, sint = np.array([0, 0]), np.array([0, 1]), np.array([3])
+    first = 2
+    keep, block_start, demand, fixed, forbid = freeze_slots(panels, pair_c, sint, [(0, 0), (1, 0)], first)
+    return dict(slots=slots[first:], companies=['Acme'], names=['cand00', 'cand01'], panels=panels[first:], pair_c=pair_c[keep],
+                pair_n=pair_n[keep], slots_int=sint, demand=demand, fixed=fixed, forbid=forbid, block_start=block_start)
+
+
+@pytest.mark.parametrize('blocks', [False, True])
+def test_from_slot_pins_in_head_block(blocks):
+    inputs = cut_interview()
+    assert inputs['block_start'].tolist() == [1] and inputs['fixed'] == [(0, 0)]
+    errors, warnings = precheck(blocks=blocks, **inputs)
+    assert errors == []
+    assert not [w for w in warnings if 'ignored' in w]
+
+
+@pytest.mark.parametrize('blocks', [False, True])
+def test_from_slot_cut_interview_solves(blocks):
+    pytest.importorskip('highspy')
+    sm = build_model(blocks=blocks, **cut_interview())
+    x, status = solve(sm, 'highs')
+    s, p = sm.allocated(x)
+    assert sorted(zip(s.tolist(), p.tolist())) == [(0, 0), (1, 1), (2, 1), (3, 1)]
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from FlowScheduler import matching_schedule
+from RollingHorizon import objective_value
+
+
+def single_slot_day(make_day, seed):
+    """Day of single slot interviews costing their slot number, the case generateSchedule solves by slot matching"""
+    day = make_day(candidates=40, multi_slot=0, seed=seed)
+    day['obj'] = np.broadcast_to(np.arange(1.0, len(day['slots']) + 1), day['obj'].shape)
+    return day
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2, 3])
+def test_matching_is_feasible_and_bounded(seed, make_day, check_schedule, mip_objective):
+    day = single_slot_day(make_day, seed)
+    allocations, bound = matching_schedule(day['panels'], day['pair_c'], day['pair_n'], len(day['names']), day['demand'])
+    check_schedule(day, allocations)
+    value, best = objective_value(day['obj'], allocations), mip_objective(day)
+    assert bound <= best + 1e-6 <= value + 2e-6
+    met = (np.bincount(day['pair_c'][[p for s, p in allocations]], minlength=len(day['companies'])) >= day['demand']).all()
+    if met and value <= bound + 1e-6:
+        # Proven optimal, as generateSchedule then skips the MIP
+        assert value == pytest.approx(best)
+
+
+def test_fixed_allocations_are_kept(make_day, check_schedule):
+    day = single_slot_day(make_day, 0)
+    p = len(day['pair_c']) - 1
+    s = int(np.flatnonzero(day['panels'][:, day['pair_c'][p]])[-1])
+    allocations, bound = matching_schedule(day['panels'], day['pair_c'], day['pair_n'], len(day['names']), day['demand'], [(s, p)])
+    check_schedule(day, allocations)
+    assert [a for a in allocations if a[1] == p] == [(s, p)]
@@ -0,0 +1,79 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from InputLoader import load_frame, load_shortlists, load_slots_interviews
+from InstanceGenerator import generate_gd, write_instance
+from InterviewGDScheduler import generateSchedule, number_panels, read_gdPanels
+
+
+def test_number_panels_without_allocations():
+    empty = np.zeros(0, dtype=np.int64)
+    clone = number_panels(empty, empty, empty, [[0, 1]], np.ones((4, 2), dtype=np.int64), np.array([2]), np.array([0]), empty)
+    assert clone.dtype == np.int64 and len(clone) == 0
+
+
+def gd_day(shift):
+    """GD ga with clones ga and ga2 opening in slots 0 and shift and GD gc, all of 2 slots, each shortlisting all 7 names"""
+    panels = np.zeros((7, 3), dtype=np.int64)
+    panels[0:6, 0], panels[shift:7, 1], panels[:, 2] = 1, 1, 1
+    return dict(companies=['ga', 'ga2', 'gc'], fixedints=dict(), allnames=['n%d' % i for i in range(7)], panels=panels,
+                pair_c=np.repeat([0, 1, 2], 7), pair_n=np.tile(np.arange(7), 3), slots=['slots_%02d' % i for i in range(7)],
+                slots_int=np.array([2, 2, 2]), gdpanels={('ga', 'ga2'), ('gc',)}, skipinitial=[])
+
+
+def run_day(inputs, **kwargs):
+    generateSchedule(out='out', solver='highs', **dict(inputs, **kwargs))
+    with open('out\\timing.json') as f:
+        report = json.load(f)
+    return pd.read_csv('out\\names.csv', index_col=0), report
+
+
+@pytest.mark.parametrize('shift', [1, 2])
+def test_aggregate_matches_clone_model(shift, tmp_path, monkeypatch):
+    pytest.importorskip('highspy')
+    monkeypatch.chdir(tmp_path)
+    clones, report = run_day(gd_day(shift))
+    aggregated, areport = run_day(gd_day(shift), aggregate=True)
+    assert areport['objective'] == pytest.approx(report['objective'])
+    assert aggregated.isin(['ga', 'ga2']).sum().sum() == clones.isin(['ga', 'ga2']).sum().sum()
+    # Every GD keeps its candidate on one panel for both of its slots
+    for name, col in aggregated.items():
+        cells = col.dropna()
+        for gd in ('ga', 'ga2', 'gc'):
+            s = [int(x[len('slots_'):]) for x in cells.index[cells == gd]]
+            assert len(s) % 2 == 0 and all(b - a == 1 for a, b in zip(s[::2], s[1::2]))
+
+
+
+def read_gd_day(folder):
+    """Inputs of a GD instance folder as the GD scheduler reads them"""
+    companies, names, pair_c, pair_n = load_shortlists(os.path.join(folder, 'Shortlists.csv'), lower=True)
+    panels = load_frame(os.path.join(folder, 'SlotsPanels.csv'), lower=True)
+    return dict(companies=companies, fixedints=dict(), allnames=names, panels=panels[companies].to_numpy(), pair_c=pair_c, pair_n=pair_n,
+                slots=list(panels.index), slots_int=load_slots_interviews(os.path.join(folder, 'SlotsGD.csv'), lower=True)[companies].to_numpy(),
+                gdpanels=read_gdPanels(os.path.join(folder, 'GDPanels.csv')), skipinitial=[])
+
+
+@pytest.mark.parametrize('seed', [0, 2])
+def test_aggregate_matches_clone_model_on_generated_days(seed, tmp_path, monkeypatch):
+    pytest.importorskip('highspy')
+    monkeypatch.chdir(tmp_path)
+    write_instance('gd', generate_gd(candidates=30, groups=3, slots=10, seed=seed))
+    day = read_gd_day('gd')
+    clones, report = run_day(day)
+    aggregated, areport = run_day(day, aggregate=True)
+    assert areport['objective'] == pytest.approx(report['objective'])
+    # Every clone panel holds one candidate at a time for whole GD blocks
+    cidx = dict((c, i) for i, c in enumerate(day['companies']))
+    for slot, row in aggregated.iterrows():
+        used = row.dropna().value_counts()
+        assert all(day['panels'][day['slots'].index(slot), cidx[c]] >= k for c, k in used.items())
+    for name, col in aggregated.items():
+        cells = col.dropna()
+        for c in cells.unique():
+            s = [day['slots'].index(x) for x in cells.index[cells == c]]
+            assert len(s) % 2 == 0 and all(b - a == 1 for a, b in zip(s[::2], s[1::2]))
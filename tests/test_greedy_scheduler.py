@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from GreedyScheduler import greedy_schedule
+from RollingHorizon import objective_value
+
+
+def greedy(day, **kwargs):
+    return greedy_schedule(day['panels'], day['pair_c'], day['pair_n'], len(day['names']), day['slots_int'], day['demand'], day['obj'], **kwargs)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_greedy_schedule_is_feasible(seed, make_day, check_schedule, mip_objective):
+    day = make_day(seed=seed)
+    allocations = greedy(day)
+    check_schedule(day, allocations)
+    assert objective_value(day['obj'], allocations) >= mip_objective(day) - 1e-6
+
+
+def test_fixed_interviews_are_kept(make_day, check_schedule):
+    day = make_day(seed=0)
+    # The second slot of the first interview block of a company with 3 slot interviews takes its whole block
+    c = int(np.flatnonzero(day['slots_int'] == 3)[0])
+    s = int(np.flatnonzero(day['panels'][:, c])[0])
+    p = int(np.flatnonzero(day['pair_c'] == c)[-1])
+    allocations = greedy(day, fixed=[(s + 1, p)])
+    check_schedule(day, allocations)
+    assert sorted(a for a in allocations if a[1] == p) == [(s, p), (s + 1, p), (s + 2, p)]
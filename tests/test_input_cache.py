@@ -0,0 +1,36 @@
+import os
+
+import numpy as np
+import pytest
+
+from InputCache import input_key, load_snapshot, save_snapshot, snapshot_path
+from InstanceGenerator import generate, write_instance
+from InterviewScheduler import read_inputs
+
+
+@pytest.fixture
+def files(tmp_path):
+    write_instance(str(tmp_path), generate(candidates=20, companies=3, slots=8, seed=1))
+    return [os.path.join(str(tmp_path), f) for f in ('Shortlists.csv', 'SlotsPanels.csv', 'SlotsInterview.csv', 'prefs.csv')]
+
+
+@pytest.mark.parametrize('with_prefs', [False, True])
+def test_snapshot_round_trip(with_prefs, files, tmp_path):
+    inputs = read_inputs(*files[:3 + with_prefs])
+    filename = snapshot_path(str(tmp_path), input_key(*files[:3 + with_prefs]))
+    save_snapshot(filename, inputs)
+    loaded = load_snapshot(filename)
+    assert sorted(loaded) == sorted(k for k, v in inputs.items() if v is not None)
+    for k, v in loaded.items():
+        if isinstance(v, list):
+            assert v == inputs[k], k
+        else:
+            assert v.dtype == np.asarray(inputs[k]).dtype and np.array_equal(v, inputs[k], equal_nan=v.dtype.kind == 'f'), k
+
+
+def test_key_follows_the_files(files):
+    key = input_key(*files)
+    assert input_key(*files[:3], None) != key
+    with open(files[1], 'a') as f:
+        f.write('\n')
+    assert input_key(*files) != key
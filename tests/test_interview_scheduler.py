@@ -0,0 +1,24 @@
+import numpy as np
+
+import InterviewScheduler
+
+
+def test_warm_start_is_kept_over_the_matching_start(tmp_path, monkeypatch):
+    starts = []
+
+    def matching_schedule(*args):
+        # A bound below the matching objective leaves the MIP to solve
+        return [(1, 0), (1, 1), (0, 2)], 0.0
+
+    def solve(sm, solver, start=None, **kwargs):
+        starts.append(sorted(zip(*(v.tolist() for v in sm.allocated(start)))))
+        return np.zeros(0), 'Not solved'
+
+    monkeypatch.setattr(InterviewScheduler, 'matching_schedule', matching_schedule)
+    monkeypatch.setattr(InterviewScheduler, 'solve', solve)
+    monkeypatch.chdir(tmp_path)
+    slots = ['Slots_00', 'Slots_01', 'Slots_02']
+    warmstart = [('Slots_00', 'Acme', 'cand00'), ('Slots_01', 'Acme', 'cand01'), ('Slots_02', 'Beta', 'cand00')]
+    InterviewScheduler.generateSchedule(['Acme', 'Beta'], dict(), ['cand00', 'cand01'], np.ones((3, 2), dtype=np.int64), None,
+                                        np.array([0, 0, 1]), np.array([0, 1, 0]), slots, np.array([1, 1]), 'out', 'highs', warmstart)
+    assert starts == [[(0, 0), (1, 1), (2, 2)]]
@@ -0,0 +1,23 @@
+import numpy as np
+
+from ModelBuilder import build_model, freeze_slots
+
+
+def test_contiguity_without_whole_blocks():
+    # Every 3 slot block after the cut misses a panel, so only the pinned head block is left and no contiguity row is built
+    panels = np.ones((9, 1), dtype=np.int64)
+    panels[[4, 7], 0] = 0
+    pair_c, pair_n, sint = np.array([0, 0]), np.array([0, 1]), np.array([3])
+    keep, block_start, demand, fixed, forbid = freeze_slots(panels, pair_c, sint, [(0, 0), (1, 0)], 2)
+    sm = build_model(['Slots_%02d' % i for i in range(2, 9)], ['Acme'], ['cand00', 'cand01'], panels[2:], pair_c[keep], pair_n[keep], sint,
+                     demand=demand, fixed=fixed, forbid=forbid, block_start=block_start)
+    assert ('contiguity', sm.num_rows, sm.num_rows) in sm.families
+    assert sm.num_rows == len(sm.sense)
+
+
+def test_variables_only_for_shortlists_with_panels(make_day):
+    day = make_day(multi_slot=0)
+    sm = build_model(**day)
+    # One variable per shortlisted pair in every slot where its company has panels
+    assert sm.num_vars == (day['panels'][:, day['pair_c']] > 0).sum()
+    assert (day['panels'][sm.var_s, day['pair_c'][sm.var_p]] > 0).all()
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from InstanceGenerator import random_instance
+from ModelBuilder import build_model
+from ModelStore import MODEL_ARRAYS, load_model, load_state, read_mps, save_model, save_state
+
+
+@pytest.mark.parametrize('blocks', [False, True])
+def test_model_round_trip(blocks, tmp_path):
+    rng = np.random.default_rng(3)
+    sint, pair_c, pair_n, panels, rank = random_instance(40, 5, 12, seed=3, multi_slot=0.5)
+    sm = build_model(['Slots_%02d' % i for i in range(12)], ['c%d' % i for i in range(5)], ['n%d' % i for i in range(40)], panels, pair_c,
+                     pair_n, sint, obj=rng.random((len(pair_c), 12)), demand=np.bincount(pair_c, minlength=5), demand_sense='<',
+                     fixed=[(0, 0)], blocks=blocks)
+    save_model(sm, str(tmp_path / 'm'), panels.max(axis=0))
+    lm, maxpanels = load_model(str(tmp_path / 'm'))
+    assert (sm.csr() != lm.csr()).nnz == 0 and maxpanels == panels.max(axis=0).tolist()
+    for k in ('obj', 'lb', 'ub', 'sense', 'rhs', 'var_s', 'var_p', 'var_len'):
+        assert np.array_equal(getattr(sm, k), getattr(lm, k)), k
+    assert lm.families == sm.families and lm.removed == sm.removed
+
+
+def test_read_mps_with_two_entries_per_line(tmp_path):
+    # Free MPS may list two rows per COLUMNS or RHS line
+    filename = str(tmp_path / 'm.mps')
+    with open(filename, 'w') as f:
+        f.write('NAME t\nROWS\n N COST\n L a\n E b\nCOLUMNS\n u COST 2.5 a 1\n u b 1\n v a 1 b -1\nRHS\n RHS a 1 b 0.5\n'
+                'BOUNDS\n UP BND u 1\n FX BND v 1\nENDATA\n')
+    sm = build_model(['s0', 's1'], ['c0'], ['n0'], np.ones((2, 1), dtype=np.int64), np.array([0]), np.array([0]), np.array([1]))
+    read_mps(filename, sm)
+    assert sm.obj.tolist() == [2.5, 0.0] and sm.lb.tolist() == [0.0, 1.0] and sm.ub.tolist() == [1.0, 1.0]
+    assert sm.sense.tolist() == ['<', '='] and sm.rhs.tolist() == [1.0, 0.5]
+    assert sm.csr().toarray().tolist() == [[1.0, 1.0], [1.0, -1.0]]
+
+
+def test_state_round_trip(make_day, tmp_path):
+    day = make_day(seed=2)
+    sm = build_model(**day)
+    filename = str(tmp_path / 'state.npz')
+    save_state(filename, sm, alloc_s=np.array([0, 1]), alloc_p=np.array([3, 3]), companies=day['companies'], slots=day['slots'],
+               names=day['names'], pair_c=day['pair_c'], pair_n=day['pair_n'], rank=None, blocks=False, status='Optimal')
+    state, lm = load_state(filename)
+    assert 'rank' not in state and state['companies'] == day['companies'] and state['status'] == 'Optimal' and not state['blocks']
+    assert state['alloc_p'].tolist() == [3, 3]
+    for k in MODEL_ARRAYS:
+        assert np.array_equal(getattr(sm, k), getattr(lm, k)), k
+    assert lm.families == sm.families and lm.removed == sm.removed and lm.slots == day['slots']
+    save_state(filename, None, slots=day['slots'])
+    assert load_state(filename) == (dict(slots=day['slots']), None)
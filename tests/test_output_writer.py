@@ -0,0 +1,8 @@
+from OutputWriter import names_frame
+
+
+def test_names_frame_keeps_every_slot():
+    df = names_frame(['Slots_00', 'Slots_01', 'Slots_02'], ['Acme', 'Beta'], ['cand00', 'cand01', 'cand02'], [0, 1, 0], [1, 0, 2], [0, 2], [0, 1])
+    assert df.index.tolist() == ['Slots_00', 'Slots_01', 'Slots_02']
+    assert df.columns.tolist() == ['cand00', 'cand01']
+    assert df.to_csv() == ',cand00,cand01\nSlots_00,,Acme\nSlots_01,,\nSlots_02,Beta,\n'
@@ -0,0 +1,20 @@
+import pytest
+
+from RollingHorizon import lp_bound, objective_value, rolling_schedule
+
+
+@pytest.mark.parametrize('seed', [0, 3])
+def test_windows_give_a_feasible_schedule(seed, make_day, check_schedule):
+    pytest.importorskip('highspy')
+    day = make_day(seed=seed)
+    allocations = rolling_schedule(window=3, lookahead=1, solver='highs', **day)
+    check_schedule(day, allocations)
+
+
+@pytest.mark.parametrize('seed', [0, 3])
+def test_one_window_matches_the_mip(seed, make_day, mip_objective):
+    day = make_day(seed=seed)
+    allocations = rolling_schedule(window=len(day['slots']), solver='highs', **day)
+    best = mip_objective(day)
+    assert objective_value(day['obj'], allocations) == pytest.approx(best)
+    assert lp_bound(solver='highs', **day) <= best + 1e-6
@@ -0,0 +1,48 @@
+import os
+
+import pandas as pd
+import pytest
+
+import ScenarioBatch
+from InstanceGenerator import generate, write_instance
+from InterviewScheduler import generateSchedule, read_inputs
+
+
+@pytest.fixture
+def instance(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    frames = generate(candidates=30, companies=4, slots=12, seed=2)
+    write_instance('inst', frames)
+    panels = frames['SlotsPanels.csv']
+    os.makedirs('scenarios')
+    panels.to_csv(os.path.join('scenarios', 'same.csv'))
+    panels.drop(columns=panels.columns[0]).to_csv(os.path.join('scenarios', 'fewer.csv'))
+    pd.DataFrame(dict(scenario=['fewer'], slotspanels=[os.path.join('scenarios', 'fewer.csv')])).to_csv('manifest.csv', index=False)
+    return [os.path.join('inst', f) for f in ('Shortlists.csv', 'SlotsPanels.csv', 'SlotsInterview.csv', 'prefs.csv')]
+
+
+def test_read_scenarios(instance):
+    assert ScenarioBatch.read_scenarios('scenarios') == [('fewer', os.path.join('scenarios', 'fewer.csv')),
+                                                         ('same', os.path.join('scenarios', 'same.csv'))]
+    assert ScenarioBatch.read_scenarios('manifest.csv') == [('fewer', os.path.join('scenarios', 'fewer.csv'))]
+
+
+def test_scenarios_match_single_runs(instance):
+    pytest.importorskip('highspy')
+    base = read_inputs(*instance)
+    base.update(fixedints=dict(), engine='c', solver='highs', method='mip', threads=1, blocks=False, time_limit=None, mip_gap=None)
+    ScenarioBatch._init(base)
+    results = [ScenarioBatch.run_scenario(s, f, 'out\\' + s) for s, f in [('base', None)] + ScenarioBatch.read_scenarios('scenarios')]
+    table = ScenarioBatch.comparison_table(results, base['companies'])
+    assert table['Scenario'].tolist() == ['base', 'fewer', 'same'] and (table['Status'] == 'Optimal').all()
+    assert table['Objective'][0] == pytest.approx(table['Objective'][2])
+    # A company without panels in the scenario leaves its whole shortlist unscheduled
+    first = base['companies'][0]
+    assert table[first][1] == (base['pair_c'] == 0).sum()
+    assert os.path.exists('out\\fewer\\names.csv') and os.path.exists('out\\fewer\\log.txt')
+
+    panels = base['panels'].copy()
+    panels[:, 0] = 0
+    single = generateSchedule(base['companies'], dict(), base['names'], panels, base['prefs'], base['pair_c'], base['pair_n'], base['slots'],
+                              base['slots_int'], 'single', 'highs')
+    assert single['objective'] == pytest.approx(table['Objective'][1])
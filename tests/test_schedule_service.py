@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import socket
+
+import numpy as np
+import pytest
+
+import ScheduleService
+from InstanceGenerator import generate, write_instance
+from InterviewScheduler import generateSchedule, read_inputs, remove_left_process
+from ModelStore import load_state
+from ScheduleService import ScheduleSession, withdraw
+
+
+@pytest.fixture
+def session(tmp_path):
+    return ScheduleSession(['Acme', 'Beta'], ['cand00', 'cand01'], np.ones((3, 2), dtype=np.int64), None, np.array([0, 0, 1]),
+                           np.array([0, 1, 0]), ['Slots_00', 'Slots_01', 'Slots_02'], np.array([1, 1]), str(tmp_path), 'highs')
+
+
+@pytest.mark.parametrize('request_, error', [
+    (dict(op='panels', slot='Slots_99', company='Acme', panels=2), 'Slots_99 is not a slot'),
+    (dict(op='panels', slot='Slots_01', company='Nope', panels=2), 'Nope is not a company'),
+    (dict(op='fix', slot='Slots_99', company='Acme', name='cand00'), 'Slots_99 is not a slot'),
+    (dict(op='fix', slot='Slots_01', company='Nope', name='cand00'), 'Nope is not a company'),
+    (dict(op='fix', slot='Slots_01', company='Beta', name='cand01'), 'cand01 is not shortlisted by Beta'),
+])
+def test_unknown_labels(session, request_, error):
+    with pytest.raises(ValueError, match=error):
+        session.apply(request_)
+
+
+def test_clashing_fix_is_refused(session):
+    session.fix('Slots_00', 'Acme', 'cand00')
+    with pytest.raises(ValueError, match='2 fixed interviews for Acme in Slots_00 but only 1 panels'):
+        session.fix('Slots_00', 'Acme', 'cand01')
+    with pytest.raises(ValueError, match='cand00 is fixed to 2 interviews in Slots_00'):
+        session.fix('Slots_00', 'Beta', 'cand00')
+    assert session.fixed == [(0, 0)]
+
+
+def test_unfix(session):
+    session.fix('Slots_01', 'Acme', 'cand00')
+    assert session.sm.lb.sum() == 1
+    session.unfix('Slots_01', 'Acme', 'cand00')
+    assert session.fixed == [] and session.sm.lb.sum() == 0
+    with pytest.raises(ValueError, match='cand00 is not fixed with Acme in Slots_01'):
+        session.unfix('Slots_01', 'Acme', 'cand00')
+
+
+def test_fix_without_schedule_is_taken_back(session, monkeypatch):
+    def optimise():
+        session.solved = False
+        return session.summary()
+
+    monkeypatch.setattr(session, 'optimise', optimise)
+    with pytest.raises(ValueError, match='the fix is taken back'):
+        session.apply(dict(op='fix', slot='Slots_02', company='Beta', name='cand00'))
+    assert session.fixed == [] and session.sm.lb.sum() == 0
+
+
+def test_fixed_pair_leaves_its_slot_in_the_start(session, monkeypatch):
+    calls = []
+
+    def solve(sm, solver, start=None, complete_start=False, **kwargs):
+        calls.append((sm.allocated(start), complete_start))
+        return np.zeros(0), 'Not solved'
+
+    monkeypatch.setattr(ScheduleService, 'solve', solve)
+    session.alloc_s, session.alloc_p = np.array([2, 1, 1]), np.array([0, 1, 2])
+    session.fix('Slots_00', 'Acme', 'cand00')
+    session.optimise()
+    (s, p), complete = calls[0]
+    assert sorted(zip(s.tolist(), p.tolist())) == [(0, 0), (1, 1), (1, 2)]
+    assert complete
+
+
+def test_bad_requests_keep_the_connection(session):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    async def client():
+        server = asyncio.ensure_future(ScheduleService.serve(session, port=port))
+        for _ in range(50):
+            try:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                break
+            except OSError:
+                await asyncio.sleep(0.05)
+        answers = []
+        for line in ['[1]', 'not json', '{"op": "left", "names": 5}', '{"op": "status"}', '{"op": "stop"}']:
+            writer.write((line + '\n').encode())
+            await writer.drain()
+            answers.append(json.loads(await reader.readline()))
+        writer.close()
+        await server
+        return answers
+
+    answers = asyncio.run(client())
+    assert answers[0] == dict(error='A request must be a JSON object')
+    assert all('error' in a for a in answers[1:3])
+    assert answers[3]['status'] == 'None' and answers[4] == dict(status='stopped')
+
+
+def test_withdraw_matches_a_fresh_run(tmp_path, monkeypatch):
+    pytest.importorskip('highspy')
+    monkeypatch.chdir(tmp_path)
+    write_instance('inst', generate(candidates=30, companies=4, slots=12, seed=4))
+    day = read_inputs(*[os.path.join('inst', f) for f in ('Shortlists.csv', 'SlotsPanels.csv', 'SlotsInterview.csv', 'prefs.csv')])
+
+    def run(left, out):
+        names, pair_c, pair_n, prefs = remove_left_process(day['names'], day['pair_c'], day['pair_n'], day['prefs'], left)
+        return generateSchedule(day['companies'], dict(), names, day['panels'], prefs, pair_c, pair_n, day['slots'], day['slots_int'], out,
+                                'highs', state=True)
+
+    run([], 'out')
+    left = [day['names'][day['pair_n'][0]]]
+    result = withdraw('out\\state.npz', left, 'after', 'highs')
+    assert result['status'] == 'Optimal' and result['objective'] == pytest.approx(run(left, 'fresh')['objective'])
+    state, sm = load_state('out\\state.npz')
+    gone = np.isin(np.asarray(state['names'])[state['pair_n']], left)
+    assert not state['active'][gone].any() and state['active'][~gone].all()
+    assert not np.isin(state['alloc_p'], np.flatnonzero(gone)).any()
+    assert left[0] not in open('after\\names.csv').readline().strip().split(',')
@@ -0,0 +1,36 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import InterviewGDScheduler
+import InterviewScheduler
+from test_gd_scheduler import gd_day
+
+
+def outputs():
+    with open('out\\timing.json') as f:
+        report = json.load(f)
+    return pd.read_csv('out\\names.csv', index_col=0), report
+
+
+@pytest.mark.parametrize('aggregate', [False, True])
+def test_gd_time_limit(aggregate, tmp_path, monkeypatch):
+    pytest.importorskip('highspy')
+    monkeypatch.chdir(tmp_path)
+    InterviewGDScheduler.generateSchedule(out='out', solver='highs', aggregate=aggregate, time_limit=1e-6, **gd_day(2))
+    names, report = outputs()
+    assert len(names) == 7 and 'status' in report
+
+
+@pytest.mark.parametrize('blocks', [False, True])
+def test_time_limit(blocks, tmp_path, monkeypatch):
+    pytest.importorskip('highspy')
+    monkeypatch.chdir(tmp_path)
+    day = gd_day(2)
+    prefs = np.tile(np.arange(1, 4), (7, 1))
+    result = InterviewScheduler.generateSchedule(day['companies'], dict(), day['allnames'], day['panels'], prefs, day['pair_c'], day['pair_n'],
+                                                 day['slots'], day['slots_int'], 'out', 'highs', blocks=blocks, time_limit=1e-6)
+    names, report = outputs()
+    assert len(names) == 7 and report['status'] == result['status']